@@ -1,13 +1,22 @@
 from fastapi import APIRouter
 from models.activity import (
     create_activity,  # Import function to create an activity
+    create_activities,  # Import function to create many activities
     ActivityModel,  # Import the activity model
     get_all_activities,  # Import function to get all activities
+    iter_all_activities,  # Import function to stream all activities
     get_activity_by_actor_id,  # Import function to get activity by actor ID
 )
-from fastapi import Header
+from fastapi import Body, Header, Query
+from typing import Any, List, Optional
+from fastapi.requests import Request
+from config.config import Config
+from utils.pagination import decode_cursor, InvalidCursorError
+from utils.bulk import process_batch
+from utils.streaming import streaming_format, stream_documents
+from utils.etag import cached_etag_response, response_key
 from utils.logger import logger  # Import logger utility
-from fastapi.responses import JSONResponse  # Import JSON response utility
+from fastapi.responses import ORJSONResponse  # Import JSON response utility
 
 router = APIRouter()  # Create a new APIRouter instance
 
@@ -19,29 +28,67 @@ async def root():
 
 
 @router.get("/get-all-activities/{organization_id}")
-async def get_all_activities_route(organization_id: str):
+async def get_all_activities_route(
+    request: Request,
+    organization_id: str,
+    limit: Optional[int] = Query(None, ge=1, le=Config.PAGINATION_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    stream: Optional[str] = Query(None, pattern="^(ndjson|json)$"),
+):
     try:
         if not organization_id:
             # Return error if organization ID is missing
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Missing organization ID", "success": False},
                 status_code=401,
             )
-        activities = await get_all_activities(organization_id)  # Fetch all activities
-        if not activities:
-            # Return error if no activities found
-            return JSONResponse(
-                {"message": "No activities found", "success": False}, status_code=404
+        # Stream the whole listing when the client asks for it
+        stream_format = streaming_format(request, stream)
+        if stream_format:
+            return stream_documents(
+                iter_all_activities(organization_id), stream_format, "Activities found"
             )
+        after = decode_cursor(cursor)
+
+        async def build():
+            activities = await get_all_activities(
+                organization_id, limit=limit, after=after
+            )  # Fetch all activities, or one page when paginating
+            if not activities:
+                # Return error if no activities found
+                return ORJSONResponse(
+                    {"message": "No activities found", "success": False},
+                    status_code=404,
+                )
 
-        # Return success response with activities data
-        return JSONResponse(
-            {"message": "Activities found", "success": True, "data": activities["data"]}
+            # Return success response with activities data
+            response = {
+                "message": "Activities found",
+                "success": True,
+                "data": activities["data"],
+            }
+            if limit is not None or cursor:
+                # Cursor for the next page, null on the last page
+                response["next_cursor"] = activities["next_cursor"]
+            return response
+
+        # Encoded once per version of the organization's data and page;
+        # unchanged polls skip both the query and the encoding
+        return await cached_etag_response(
+            request,
+            organization_id,
+            response_key("activities", None, limit, cursor),
+            build,
+            Config.LIST_CACHE_CONTROL,
+        )
+    except InvalidCursorError:
+        return ORJSONResponse(
+            {"message": "Invalid cursor", "success": False}, status_code=400
         )
     except Exception as e:
         logger.error(f"Error fetching activities: {str(e)}")  # Log the error
         # Return error response
-        return JSONResponse(
+        return ORJSONResponse(
             {"message": "Error fetching activities", "success": False}, status_code=500
         )
 
@@ -51,13 +98,13 @@ async def get_activity(organization_id: str, actor_id: str):
     try:
         if not actor_id:
             # Return error if actor ID is missing
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Missing actor ID", "success": False},
                 status_code=401,
             )
         if not organization_id:
             # Return error if organization ID is missing
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Missing organization ID", "success": False},
                 status_code=401,
             )
@@ -66,7 +113,7 @@ async def get_activity(organization_id: str, actor_id: str):
     except Exception as e:
         logger.error(f"Error fetching activity: {str(e)}")  # Log the error
         # Return error response
-        return JSONResponse(
+        return ORJSONResponse(
             {"message": "Error fetching activity", "success": False}, status_code=500
         )
 
@@ -80,22 +127,53 @@ async def create_activity_route(
     try:
         if not activity:
             # Return error if activity data is missing
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Missing activity data", "success": False}, status_code=401
             )
         activity_created = await create_activity(activity)  # Create new activity
         if activity_created["success"]:
             # Return success response if activity created successfully
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Activity created successfully", "success": True}
             )
         # Return error response if activity creation failed
-        return JSONResponse(
+        return ORJSONResponse(
             {"message": "Error creating activity", "success": False}, status_code=500
         )
     except Exception as e:
         logger.error(f"Error creating activity: {str(e)}")  # Log the error
         # Return error response
-        return JSONResponse(
+        return ORJSONResponse(
             {"message": "Error creating activity", "success": False}, status_code=500
         )
+
+
+@router.post("/bulk-create-activities")
+async def bulk_create_activities_route(
+    activities: List[Any] = Body(..., max_length=Config.BULK_MAX_ITEMS),
+    organizationId: str = Header(...),  # Organization ID from request header
+    sessionId: str = Header(...),  # Session ID from request header
+):
+    try:
+        # Validate every activity, insert them in bulk and report each one
+        result = await process_batch(
+            activities,
+            ActivityModel,
+            organizationId,
+            "activity_id",
+            lambda valid, _: create_activities(valid),
+        )
+        if not result["success"]:
+            return ORJSONResponse(
+                {"message": "Error creating activities", "success": False},
+                status_code=500,
+            )
+        return ORJSONResponse(
+            {"message": result["message"], "success": True, "data": result["data"]}
+        )
+    except Exception as e:
+        logger.error(f"Error creating activities: {str(e)}")  # Log the error
+        # Return error response
+        return ORJSONResponse(
+            {"message": "Error creating activities", "success": False}, status_code=500
+        )
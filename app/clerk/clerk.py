@@ -1,45 +1,49 @@
-from clerk_backend_api import Clerk
+from clerk_backend_api import Clerk, models
 from config.config import Config
 from utils.logger import logger
+from utils.cache import TTLCache, MISSING
+from app.clerk.memberships import membership_index
+import base64
+import hashlib
+import hmac
 import time
 
+# Cache of (session_id, organization_id) -> session verdict
+session_cache = TTLCache(
+    maxsize=Config.CLERK_SESSION_CACHE_MAX_ENTRIES,
+    ttl=Config.CLERK_SESSION_CACHE_TTL_SECONDS,
+)
 
-# Function to check if a user is part of an organization
-async def check_user_in_organization(user_id: str, organization_id: str):
-    try:
-        # Initialize Clerk API client with bearer authentication
-        clerk = Clerk(bearer_auth=Config.CLERK_SECRET_KEY)
 
-        # Fetch user details asynchronously
-        user = await clerk.users.get_async(user_id=user_id)
-        if not user:
-            return {"message": "User not found", "success": False}
+def to_seconds(timestamp: int) -> float:
+    # Clerk reports timestamps in milliseconds since the epoch
+    return timestamp / 1000 if timestamp > 10**11 else timestamp
 
-        # Fetch organization memberships asynchronously
-        organization = await clerk.organization_memberships.list_async(
-            organization_id=organization_id
-        )
 
-        if not organization:
-            logger.error("Organization not found")
-            return {"message": "Organization not found", "success": False}
-
-        # Extract member IDs from organization data
-        members_id = [member.public_user_data.user_id for member in organization.data]
-
-        # Check if user is part of the organization
-        if user_id not in members_id:
+# Function to check if a user is part of an organization
+async def check_user_in_organization(user_id: str, organization_id: str):
+    try:
+        # Check if user is part of the organization using the membership index;
+        # a member is a user Clerk knows, so the user is not fetched separately
+        if not await membership_index.is_member(user_id, organization_id):
             logger.error("User not in organization")
             return {"message": "User not in organization", "success": False}
 
         return {"message": "User in organization", "success": True}
     except Exception as e:
         logger.error(f"An error occurred: {str(e)}")
-        return {"message": "An error occurred", "success": False}
+        # Flagged so callers can tell a Clerk or network failure from a denial
+        return {"message": "An error occurred", "success": False, "error": True}
 
 
 # Function to check if a user session is valid and belongs to an organization
 async def check_user_session(session_id: str, organization_id: str):
+    # Reuse a recent verdict for this session and organization
+    cache_key = (session_id, organization_id)
+    verdict = session_cache.get(cache_key)
+    if verdict is not MISSING:
+        return verdict
+
     try:
         # Initialize Clerk API client with bearer authentication
         clerk = Clerk(bearer_auth=Config.CLERK_SECRET_KEY)
@@ -49,20 +53,49 @@ async def check_user_session(session_id: str, organization_id: str):
 
         if not user:
             logger.error("User not found")
-            return {"message": "User not found", "success": False}
+            verdict = {"message": "User not found", "success": False}
+            session_cache.set(
+                cache_key, verdict, ttl=Config.CLERK_SESSION_NEGATIVE_TTL_SECONDS
+            )
+            return verdict
 
         # Check if user is part of the organization
         organization = await check_user_in_organization(
             user_id=user.user_id, organization_id=organization_id
         )
 
+        if organization.get("error"):
+            # The membership could not be checked; not a denial, so not cached
+            return {"message": "An error occurred", "success": False}
+
         # Check if the session is active and the user has the organization_id in the session
-        if user.expire_at < int(time.time()) or organization["success"] == False:
+        expires_in = to_seconds(user.expire_at) - time.time()
+        if expires_in <= 0 or organization["success"] == False:
             logger.error("Session expired or user not in organization")
-            return {"message": "Access denied to secure endpoint", "success": False}
-
-        return {"message": "Access granted to secure endpoint", "success": True}
+            verdict = {"message": "Access denied to secure endpoint", "success": False}
+            session_cache.set(
+                cache_key, verdict, ttl=Config.CLERK_SESSION_NEGATIVE_TTL_SECONDS
+            )
+            return verdict
+
+        # Never trust a cached grant past the session's own expiry
+        verdict = {"message": "Access granted to secure endpoint", "success": True}
+        session_cache.set(
+            cache_key,
+            verdict,
+            ttl=min(Config.CLERK_SESSION_CACHE_TTL_SECONDS, expires_in),
+        )
+        return verdict
+    except models.ClerkErrors as e:
+        # Raised for 400/401/404: an unknown or invalid session, which is a denial
+        logger.error(f"Session rejected by Clerk: {str(e)}")
+        verdict = {"message": "User not found", "success": False}
+        session_cache.set(
+            cache_key, verdict, ttl=Config.CLERK_SESSION_NEGATIVE_TTL_SECONDS
+        )
+        return verdict
     except Exception as e:
+        # 5xx and transport errors say nothing about the session, so not cached
         logger.error(f"An error occurred: {str(e)}")
         return {"message": "An error occurred", "success": False}
 
@@ -92,3 +125,41 @@ async def get_organization_data(organization_slug):
     except Exception as e:
         logger.error(f"An error occurred: {str(e)}")
         return {"message": "An error occurred", "success": False}
+
+
+# Function to verify the Svix signature Clerk attaches to webhook deliveries
+def verify_webhook_signature(headers, body: bytes) -> bool:
+    try:
+        message_id = headers.get("svix-id")
+        timestamp = headers.get("svix-timestamp")
+        signatures = headers.get("svix-signature")
+        if not message_id or not timestamp or not signatures or not Config.SIGNING_SECRET:
+            return False
+
+        # Reject replays of old deliveries
+        if abs(time.time() - int(timestamp)) > Config.CLERK_WEBHOOK_TOLERANCE_SECONDS:
+            return False
+
+        secret = Config.SIGNING_SECRET
+        if secret.startswith("whsec_"):
+            secret = secret[len("whsec_") :]
+        signed_content = f"{message_id}.{timestamp}.".encode() + body
+        expected = base64.b64encode(
+            hmac.new(base64.b64decode(secret), signed_content, hashlib.sha256).digest()
+        ).decode()
+
+        # The header holds space separated "v1,<signature>" entries
+        return any(
+            hmac.compare_digest(signature.split(",", 1)[-1], expected)
+            for signature in signatures.split(" ")
+        )
+    except Exception as e:
+        logger.error(f"An error occurred in verifying webhook: {str(e)}")
+        return False
+
+
+# Function to drop cached membership data after a Clerk webhook event
+def invalidate_organization_membership(organization_id: str = None):
+    membership_index.invalidate(organization_id)
+    # Cached session grants may rely on a membership that no longer exists
+    session_cache.clear()
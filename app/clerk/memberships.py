@@ -0,0 +1,114 @@
+import asyncio
+import time
+from typing import Dict, Set
+from clerk_backend_api import Clerk
+from config.config import Config
+from utils.logger import logger
+
+
+class MembershipIndex:
+    """Per-organization set of member user IDs, loaded from Clerk.
+
+    The first lookup for an organization pages through all of its memberships.
+    Later lookups are served from memory. Once an entry is older than the TTL,
+    a background refresh is scheduled and the current set keeps serving.
+    """
+
+    def __init__(self, ttl: float, page_size: int, min_refresh_interval: float):
+        self.ttl = ttl
+        self.page_size = page_size
+        self.min_refresh_interval = min_refresh_interval
+        self._members: Dict[str, Set[str]] = {}
+        self._loaded_at: Dict[str, float] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+
+    async def _load(self, organization_id: str) -> Set[str]:
+        """Page through every membership of the organization."""
+        clerk = Clerk(bearer_auth=Config.CLERK_SECRET_KEY)
+        members = set()
+        offset = 0
+        while True:
+            page = await clerk.organization_memberships.list_async(
+                organization_id=organization_id, limit=self.page_size, offset=offset
+            )
+            if not page or not page.data:
+                break
+            members.update(
+                member.public_user_data.user_id
+                for member in page.data
+                if member.public_user_data
+            )
+            offset += len(page.data)
+            if len(page.data) < self.page_size or (
+                page.total_count is not None and offset >= page.total_count
+            ):
+                break
+        return members
+
+    async def _refresh_now(self, organization_id: str) -> Set[str]:
+        task = asyncio.current_task()
+        try:
+            members = await self._load(organization_id)
+            # Drop the result if the organization was invalidated meanwhile
+            if self._refreshing.get(organization_id) is task:
+                self._members[organization_id] = members
+                self._loaded_at[organization_id] = time.monotonic()
+            return members
+        finally:
+            if self._refreshing.get(organization_id) is task:
+                self._refreshing.pop(organization_id)
+
+    def refresh(self, organization_id: str) -> asyncio.Task:
+        """Start (or join) a reload of the organization's members."""
+        task = self._refreshing.get(organization_id)
+        if task is None:
+            task = asyncio.ensure_future(self._refresh_now(organization_id))
+            self._refreshing[organization_id] = task
+        return task
+
+    async def is_member(self, user_id: str, organization_id: str) -> bool:
+        members = self._members.get(organization_id)
+        if members is None:
+            # First lookup for this organization, the caller has to wait for it
+            members = await asyncio.shield(self.refresh(organization_id))
+            return user_id in members
+
+        age = time.monotonic() - self._loaded_at[organization_id]
+        if user_id not in members and age >= self.min_refresh_interval:
+            # The user may have joined since the last load
+            members = await asyncio.shield(self.refresh(organization_id))
+        elif age >= self.ttl:
+            # Serve the current set and refresh it in the background
+            self.refresh(organization_id).add_done_callback(log_refresh_errors)
+        return user_id in members
+
+    def invalidate(self, organization_id: str = None):
+        """Forget the members of one organization, or of all organizations."""
+        if organization_id is None:
+            self._members.clear()
+            self._loaded_at.clear()
+            self._refreshing.clear()
+            return
+        self._members.pop(organization_id, None)
+        self._loaded_at.pop(organization_id, None)
+        self._refreshing.pop(organization_id, None)
+
+    def stats(self):
+        return {
+            "organizations": len(self._members),
+            "members": sum(len(members) for members in self._members.values()),
+            "refreshing": len(self._refreshing),
+        }
+
+
+def log_refresh_errors(task: asyncio.Task):
+    if not task.cancelled() and task.exception():
+        logger.error(f"Membership refresh failed: {str(task.exception())}")
+
+
+# Membership index shared by every request handled by this worker
+membership_index = MembershipIndex(
+    ttl=Config.CLERK_MEMBERSHIP_TTL_SECONDS,
+    page_size=Config.CLERK_MEMBERSHIP_PAGE_SIZE,
+    min_refresh_interval=Config.CLERK_MEMBERSHIP_MIN_REFRESH_SECONDS,
+)
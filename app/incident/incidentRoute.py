@@ -1,10 +1,22 @@
-from fastapi import APIRouter, Header
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Body, Header, Query
+from fastapi.responses import ORJSONResponse
+from typing import Any, List, Optional
+from fastapi.requests import Request
+from config.config import Config
+from utils.pagination import decode_cursor, InvalidCursorError
+from utils.bulk import process_batch
+from utils.projection import select_fields, InvalidProjectionError
+from utils.streaming import streaming_format, stream_documents
+from utils.etag import cached_etag_response, response_key
 from utils.logger import logger
 from models.incident import (
     create_incident,
     IncidentModel,
+    INCIDENT_VIEWS,
+    create_incidents,
+    update_incidents,
     get_all_incidents,
+    iter_all_incidents,
     get_incident_by_id,
     update_incident,
     delete_incident,
@@ -19,25 +31,71 @@ async def root():
 
 
 @router.get("/get-all-incidents/{organizationId}")
-async def get_all_incidents_route(organizationId: str):
+async def get_all_incidents_route(
+    request: Request,
+    organizationId: str,
+    limit: Optional[int] = Query(None, ge=1, le=Config.PAGINATION_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    stream: Optional[str] = Query(None, pattern="^(ndjson|json)$"),
+    fields: Optional[str] = None,
+    view: Optional[str] = None,
+):
     try:
         if not organizationId:  # Check if organizationId is provided
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Missing organization ID", "success": False},
                 status_code=401,
             )
-        incidents = await get_all_incidents(organizationId)  # Fetch all incidents
-        if not incidents:  # Check if incidents are found
-            return JSONResponse(
-                {"message": "No incidents found", "success": False}, status_code=404
+        # Only read the requested fields or named view from the database
+        selected = select_fields(
+            IncidentModel.model_fields, INCIDENT_VIEWS, fields, view
+        )
+        # Stream the whole listing when the client asks for it
+        stream_format = streaming_format(request, stream)
+        if stream_format:
+            return stream_documents(
+                iter_all_incidents(organizationId, fields=selected),
+                stream_format,
+                "Incidents found",
             )
+        after = decode_cursor(cursor)
+
+        async def build():
+            incidents = await get_all_incidents(
+                organizationId, limit=limit, after=after, fields=selected
+            )  # Fetch all incidents, or one page when paginating
+            if not incidents:  # Check if incidents are found
+                return ORJSONResponse(
+                    {"message": "No incidents found", "success": False}, status_code=404
+                )
+
+            response = {
+                "message": "Incidents found",
+                "success": True,
+                "data": incidents["data"],
+            }
+            if limit is not None or cursor:  # Cursor for the next page when paginating
+                response["next_cursor"] = incidents["next_cursor"]
+            return response
 
-        return JSONResponse(
-            {"message": "Incidents found", "success": True, "data": incidents["data"]}
+        # Encoded once per version of the organization's data, field selection
+        # and page; unchanged polls skip both the query and the encoding
+        return await cached_etag_response(
+            request,
+            organizationId,
+            response_key("incidents", selected, limit, cursor),
+            build,
+            Config.LIST_CACHE_CONTROL,
         )
+    except InvalidCursorError:
+        return ORJSONResponse(
+            {"message": "Invalid cursor", "success": False}, status_code=400
+        )
+    except InvalidProjectionError as e:
+        return ORJSONResponse({"message": str(e), "success": False}, status_code=400)
     except Exception as e:
         logger.error(f"Error fetching incidents: {str(e)}")  # Log the error
-        return JSONResponse(
+        return ORJSONResponse(
             {"message": "Error fetching incidents", "success": False}, status_code=500
         )
 
@@ -46,7 +104,7 @@ async def get_all_incidents_route(organizationId: str):
 async def get_incident_route(organizationId: str, incidentId: str):
     try:
         if not incidentId:  # Check if incidentId is provided
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Missing incident ID", "success": False},
                 status_code=401,
             )
@@ -55,15 +113,15 @@ async def get_incident_route(organizationId: str, incidentId: str):
         )  # Fetch incident by ID
 
         if not incident:  # Check if incident is found
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Incident not found", "success": False}, status_code=404
             )
-        return JSONResponse(
+        return ORJSONResponse(
             {"message": "Incident found", "success": True, "data": incident["data"]}
         )
     except Exception as e:
         logger.error(f"Error fetching incident: {str(e)}")  # Log the error
-        return JSONResponse(
+        return ORJSONResponse(
             {"message": "Error fetching incident", "success": False}, status_code=500
         )
 
@@ -76,17 +134,17 @@ async def create_incident_route(
 ):
     try:
         if not incident:  # Check if incident data is provided
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Missing incident data", "success": False},
                 status_code=400,
             )
         incident = await create_incident(incident)  # Create a new incident
         if not incident:  # Check if incident creation was successful
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Incident creation failed", "success": False},
                 status_code=400,
             )
-        return JSONResponse(
+        return ORJSONResponse(
             {
                 "message": "Incident created successfully",
                 "success": True,
@@ -94,7 +152,7 @@ async def create_incident_route(
         )
     except Exception as e:
         logger.error(f"Error creating incident: {str(e)}")  # Log the error
-        return JSONResponse(
+        return ORJSONResponse(
             {"message": "Error creating incident", "success": False}, status_code=500
         )
 
@@ -107,7 +165,7 @@ async def update_incident_route(
 ):
     try:
         if not incident:  # Check if incident data is provided
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Missing incident data", "success": False},
                 status_code=400,
             )
@@ -115,11 +173,11 @@ async def update_incident_route(
             incident=incident, organization_id=organizationId
         )  # Update the incident
         if not incident:  # Check if incident update was successful
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Incident update failed", "success": False},
                 status_code=400,
             )
-        return JSONResponse(
+        return ORJSONResponse(
             {
                 "message": "Incident updated successfully",
                 "success": True,
@@ -127,16 +185,68 @@ async def update_incident_route(
         )
     except Exception as e:
         logger.error(f"Error updating incident: {str(e)}")  # Log the error
-        return JSONResponse(
+        return ORJSONResponse(
             {"message": "Error updating incident", "success": False}, status_code=500
         )
 
 
+@router.post("/bulk-create-incidents")
+async def bulk_create_incidents_route(
+    incidents: List[Any] = Body(..., max_length=Config.BULK_MAX_ITEMS),
+    organizationId: str = Header(...),
+    sessionId: str = Header(...),
+):
+    try:
+        # Validate every item, write them in bulk and report each one
+        result = await process_batch(
+            incidents, IncidentModel, organizationId, "incident_id", create_incidents
+        )
+        if not result["success"]:
+            return ORJSONResponse(
+                {"message": "Incident creation failed", "success": False},
+                status_code=500,
+            )
+        return ORJSONResponse(
+            {"message": result["message"], "success": True, "data": result["data"]}
+        )
+    except Exception as e:
+        logger.error(f"Error creating incidents: {str(e)}")  # Log the error
+        return ORJSONResponse(
+            {"message": "Error creating incidents", "success": False}, status_code=500
+        )
+
+
+@router.post("/bulk-update-incidents")
+async def bulk_update_incidents_route(
+    incidents: List[Any] = Body(..., max_length=Config.BULK_MAX_ITEMS),
+    organizationId: str = Header(...),
+    sessionId: str = Header(...),
+):
+    try:
+        # Validate every item, write them in bulk and report each one
+        result = await process_batch(
+            incidents, IncidentModel, organizationId, "incident_id", update_incidents
+        )
+        if not result["success"]:
+            return ORJSONResponse(
+                {"message": "Incident update failed", "success": False},
+                status_code=500,
+            )
+        return ORJSONResponse(
+            {"message": result["message"], "success": True, "data": result["data"]}
+        )
+    except Exception as e:
+        logger.error(f"Error updating incidents: {str(e)}")  # Log the error
+        return ORJSONResponse(
+            {"message": "Error updating incidents", "success": False}, status_code=500
+        )
+
+
 @router.delete("/delete-incident/{incidentId}")
 async def delete_incident_route(incidentId: str, organizationId: str = Header(...)):
     try:
         if not incidentId:  # Check if incidentId is provided
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Missing incident ID", "success": False},
                 status_code=400,
             )
@@ -144,11 +254,11 @@ async def delete_incident_route(incidentId: str, organizationId: str = Header(..
             incident_id=incidentId, organization_id=organizationId
         )  # Delete the incident
         if not incident:  # Check if incident deletion was successful
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Incident deletion failed", "success": False},
                 status_code=400,
             )
-        return JSONResponse(
+        return ORJSONResponse(
             {
                 "message": "Incident deleted successfully",
                 "success": True,
@@ -156,6 +266,6 @@ async def delete_incident_route(incidentId: str, organizationId: str = Header(..
         )
     except Exception as e:
         logger.error(f"Error deleting incident: {str(e)}")  # Log the error
-        return JSONResponse(
+        return ORJSONResponse(
             {"message": "Error deleting incident", "success": False}, status_code=500
         )
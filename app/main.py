@@ -1,17 +1,35 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from utils.logger import logger
-from app.clerk.clerk import check_user_session, get_organization_data
+from app.clerk.clerk import check_user_session, get_organization_data, session_cache
+from utils.database import (
+    connect_to_mongodb,
+    close_mongodb_connection,
+    get_pool_stats,
+)
+from utils.cache import public_page_cache
+from utils.indexes import provision_indexes, get_index_report
+from utils.metrics import (
+    MetricsMiddleware,
+    registry,
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+)
+from config.config import Config
 from fastapi.requests import Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response
 from app.activity.activityRoutes import router as activity_router
 from app.services.serviceRoute import router as service_router
 from app.incident.incidentRoute import router as incident_router
 from app.maintenance.maintenanceRoute import router as maintenance_router
 from app.publicPage.publicRoutes import router as public_page_router
+from app.webhooks.webhookRoutes import router as webhook_router
+from app.clerk.memberships import membership_index
+from app.sockets.sockets import manager
+from models import publicPageSnapshot
+import hmac
 
 # Create an instance of the FastAPI class
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # List of allowed origins for CORS
 origins = [
@@ -30,6 +48,7 @@ async def session_middleware(request: Request, call_next):
         "docs",
         "openapi.json",
         "favicon.ico",
+        "api/v1/webhooks/clerk",  # Verified with the webhook signing secret
     ]:
         return await call_next(request)
 
@@ -41,7 +60,7 @@ async def session_middleware(request: Request, call_next):
         # Check if session or organization ID is missing
         if not session_id or not organization_id:
             logger.error("Missing session or organization ID")
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Missing session or organization ID", "success": False},
                 status_code=401,
             )
@@ -52,7 +71,7 @@ async def session_middleware(request: Request, call_next):
         # If authentication fails, return 401 response
         if not user["success"]:
             logger.error("Authentication failed")
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Authentication failed", "success": False}, status_code=401
             )
 
@@ -62,7 +81,7 @@ async def session_middleware(request: Request, call_next):
     except Exception as e:
         # Log any exceptions that occur
         logger.error(f"Middleware error: {str(e)}")
-        return JSONResponse(
+        return ORJSONResponse(
             {"message": "Authentication failed", "success": False}, status_code=401
         )
 
@@ -76,11 +95,28 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers
 )
 
+# Record per-route request metrics; added last so it wraps every other middleware
+app.add_middleware(MetricsMiddleware)
+
 
 # Event handler for the startup event
 @app.on_event("startup")
 async def startup_event():
     logger.info("Connecting to MongoDB")
+    connect_to_mongodb()
+    if Config.MONGO_ENSURE_INDEXES:
+        await provision_indexes()
+    await publicPageSnapshot.start()
+    logger.info(f"Starting {Config.BROADCAST_BACKEND} broadcast backend")
+    await manager.start()
+
+
+# Event handler for the shutdown event
+@app.on_event("shutdown")
+async def shutdown_event():
+    await manager.stop()
+    logger.info("Closing MongoDB connection")
+    close_mongodb_connection()
 
 
 # Define a root endpoint
@@ -90,6 +126,84 @@ async def root():
     return {"message": "Welcome to the Stato-gram API"}
 
 
+def health_authorized(request: Request) -> bool:
+    """Whether the request carries the configured HEALTH_TOKEN."""
+    token = request.headers.get("X-Health-Token", "")
+    # Compared as bytes: compare_digest rejects non-ASCII str arguments
+    return bool(Config.HEALTH_TOKEN) and hmac.compare_digest(
+        token.encode(), Config.HEALTH_TOKEN.encode()
+    )
+
+
+# Endpoint to inspect the shared MongoDB connection pool
+@app.get("/api/v1/health/database")
+async def database_health(request: Request):
+    # Keyed by server host:port, so the topology is not shown to anonymous callers
+    if not health_authorized(request):
+        return ORJSONResponse(
+            {"message": "Forbidden", "success": False}, status_code=403
+        )
+    return ORJSONResponse({"success": True, "data": get_pool_stats()})
+
+
+# Endpoint to report missing, undeclared and unused indexes
+@app.get("/api/v1/health/indexes")
+async def index_health(request: Request):
+    # Runs $indexStats on every collection, so it is not open to anonymous callers
+    if not health_authorized(request):
+        return ORJSONResponse(
+            {"message": "Forbidden", "success": False}, status_code=403
+        )
+    try:
+        return ORJSONResponse({"success": True, "data": await get_index_report()})
+    except Exception as e:
+        logger.error(f"An error occurred: {str(e)}")
+        return ORJSONResponse(
+            {"message": "An error occurred", "success": False}, status_code=500
+        )
+
+
+# Endpoint to inspect the in-process caches
+@app.get("/api/v1/health/cache")
+async def cache_health():
+    return ORJSONResponse(
+        {
+            "success": True,
+            "data": {
+                "public_page": public_page_cache.stats(),
+                "sessions": session_cache.stats(),
+                "memberships": membership_index.stats(),
+            },
+        }
+    )
+
+
+# Endpoint to inspect live WebSocket connections on this worker
+@app.get("/api/v1/health/websockets")
+async def websocket_health(request: Request):
+    # Anonymous callers only get the total, not which organizations have viewers
+    if not health_authorized(request):
+        return ORJSONResponse(
+            {"success": True, "data": {"total": manager.connection_count()}}
+        )
+    return ORJSONResponse(
+        {
+            "success": True,
+            "data": {
+                "total": manager.connection_count(),
+                "organizations": manager.connection_counts(),
+                "coalescing": manager.coalescer.stats(),
+            },
+        }
+    )
+
+
+# Endpoint serving this worker's metrics in the Prometheus text format
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
 # Endpoint to get organization ID by slug
 @app.get("/api/v1/public-route/get-organization-id/{organization_slug}")
 async def get_organization_id(organization_slug: str):
@@ -99,12 +213,12 @@ async def get_organization_id(organization_slug: str):
 
         # If organization not found, return 404 response
         if not organization_data["success"]:
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Organization not found", "success": False}, status_code=404
             )
 
         # Return organization data if found
-        return JSONResponse(
+        return ORJSONResponse(
             {
                 "message": "Organization found",
                 "data": organization_data["data"],
@@ -114,7 +228,7 @@ async def get_organization_id(organization_slug: str):
     except Exception as e:
         # Log any exceptions that occur
         logger.error(f"An error occurred: {str(e)}")
-        return JSONResponse(
+        return ORJSONResponse(
             {"message": "An error occurred", "success": False}, status_code=500
         )
 
@@ -129,6 +243,7 @@ app.include_router(
 app.include_router(
     public_page_router, prefix="/api/v1/public-page", tags=["Public Page"]
 )
+app.include_router(webhook_router, prefix="/api/v1/webhooks", tags=["Webhooks"])
 
 # Run the application using Uvicorn
 if __name__ == "__main__":
@@ -1,10 +1,22 @@
-from fastapi import APIRouter, Header
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Body, Header, Query
+from fastapi.responses import ORJSONResponse
+from typing import Any, List, Optional
+from fastapi.requests import Request
+from config.config import Config
+from utils.pagination import decode_cursor, InvalidCursorError
+from utils.bulk import process_batch
+from utils.projection import select_fields, InvalidProjectionError
+from utils.streaming import streaming_format, stream_documents
+from utils.etag import cached_etag_response, response_key
 from utils.logger import logger
 from models.maintenance import (
     create_maintenance,
     Maintenance,
+    MAINTENANCE_VIEWS,
+    create_maintenances,
+    update_maintenances,
     get_all_maintenances,
+    iter_all_maintenances,
     get_maintenance_by_id,
     update_maintenance,
     delete_maintenance,
@@ -21,29 +33,74 @@ async def root():
 
 # Endpoint to get all maintenances for a specific organization
 @router.get("/get-all-maintenances/{organizationId}")
-async def get_all_maintenances_route(organizationId: str):
+async def get_all_maintenances_route(
+    request: Request,
+    organizationId: str,
+    limit: Optional[int] = Query(None, ge=1, le=Config.PAGINATION_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    stream: Optional[str] = Query(None, pattern="^(ndjson|json)$"),
+    fields: Optional[str] = None,
+    view: Optional[str] = None,
+):
     try:
         if not organizationId:
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Missing organization ID", "success": False},
                 status_code=401,
             )
-        maintenances = await get_all_maintenances(organizationId)
-        if not maintenances:
-            return JSONResponse(
-                {"message": "No maintenances found", "success": False}, status_code=404
+        # Only read the requested fields or named view from the database
+        selected = select_fields(
+            Maintenance.model_fields, MAINTENANCE_VIEWS, fields, view
+        )
+        # Stream the whole listing when the client asks for it
+        stream_format = streaming_format(request, stream)
+        if stream_format:
+            return stream_documents(
+                iter_all_maintenances(organizationId, fields=selected),
+                stream_format,
+                "Maintenances found",
             )
+        after = decode_cursor(cursor)
 
-        return JSONResponse(
-            {
+        async def build():
+            # Fetch all maintenances, or one page when paginating
+            maintenances = await get_all_maintenances(
+                organizationId, limit=limit, after=after, fields=selected
+            )
+            if not maintenances:
+                return ORJSONResponse(
+                    {"message": "No maintenances found", "success": False},
+                    status_code=404,
+                )
+
+            response = {
                 "message": "Maintenances found",
                 "success": True,
                 "data": maintenances["data"],
             }
+            if limit is not None or cursor:
+                # Cursor for the next page, null on the last page
+                response["next_cursor"] = maintenances["next_cursor"]
+            return response
+
+        # Encoded once per version of the organization's data, field selection
+        # and page; unchanged polls skip both the query and the encoding
+        return await cached_etag_response(
+            request,
+            organizationId,
+            response_key("maintenances", selected, limit, cursor),
+            build,
+            Config.LIST_CACHE_CONTROL,
         )
+    except InvalidCursorError:
+        return ORJSONResponse(
+            {"message": "Invalid cursor", "success": False}, status_code=400
+        )
+    except InvalidProjectionError as e:
+        return ORJSONResponse({"message": str(e), "success": False}, status_code=400)
     except Exception as e:
         logger.error(f"Error fetching maintenances: {str(e)}")
-        return JSONResponse(
+        return ORJSONResponse(
             {"message": "Error fetching maintenances", "success": False},
             status_code=500,
         )
@@ -54,7 +111,7 @@ async def get_all_maintenances_route(organizationId: str):
 async def get_maintenance_route(organizationId: str, maintenanceId: str):
     try:
         if not maintenanceId:
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Missing maintenance ID", "success": False},
                 status_code=401,
             )
@@ -63,10 +120,10 @@ async def get_maintenance_route(organizationId: str, maintenanceId: str):
         )
 
         if not maintenance:
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Maintenance not found", "success": False}, status_code=404
             )
-        return JSONResponse(
+        return ORJSONResponse(
             {
                 "message": "Maintenance found",
                 "success": True,
@@ -75,7 +132,7 @@ async def get_maintenance_route(organizationId: str, maintenanceId: str):
         )
     except Exception as e:
         logger.error(f"Error fetching maintenance: {str(e)}")
-        return JSONResponse(
+        return ORJSONResponse(
             {"message": "Error fetching maintenance", "success": False}, status_code=500
         )
 
@@ -89,19 +146,19 @@ async def create_maintenance_route(
 ):
     try:
         if not maintenance:
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Missing maintenance data", "success": False},
                 status_code=401,
             )
         maintenance = await create_maintenance(maintenance)
 
         if not maintenance:
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Error creating maintenance", "success": False},
                 status_code=400,
             )
 
-        return JSONResponse(
+        return ORJSONResponse(
             {
                 "message": "Maintenance created",
                 "success": True,
@@ -110,7 +167,7 @@ async def create_maintenance_route(
         )
     except Exception as e:
         logger.error(f"Error creating maintenance: {str(e)}")
-        return JSONResponse(
+        return ORJSONResponse(
             {"message": "Error creating maintenance", "success": False},
             status_code=500,
         )
@@ -125,7 +182,7 @@ async def update_maintenance_route(
 ):
     try:
         if not maintenance:
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Missing maintenance data", "success": False},
                 status_code=401,
             )
@@ -134,12 +191,12 @@ async def update_maintenance_route(
         )
 
         if not maintenance:
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Error updating maintenance", "success": False},
                 status_code=400,
             )
 
-        return JSONResponse(
+        return ORJSONResponse(
             {
                 "message": "Maintenance updated",
                 "success": True,
@@ -148,12 +205,66 @@ async def update_maintenance_route(
         )
     except Exception as e:
         logger.error(f"Error updating maintenance: {str(e)}")
-        return JSONResponse(
+        return ORJSONResponse(
             {"message": "Error updating maintenance", "success": False},
             status_code=500,
         )
 
 
+# Endpoint to create many maintenance records at once
+@router.post("/bulk-create-maintenances")
+async def bulk_create_maintenances_route(
+    maintenances: List[Any] = Body(..., max_length=Config.BULK_MAX_ITEMS),
+    organizationId: str = Header(...),
+    sessionId: str = Header(...),
+):
+    try:
+        # Validate every item, write them in bulk and report each one
+        result = await process_batch(
+            maintenances, Maintenance, organizationId, "maintenance_id", create_maintenances
+        )
+        if not result["success"]:
+            return ORJSONResponse(
+                {"message": "Maintenance creation failed", "success": False},
+                status_code=500,
+            )
+        return ORJSONResponse(
+            {"message": result["message"], "success": True, "data": result["data"]}
+        )
+    except Exception as e:
+        logger.error(f"Error creating maintenances: {str(e)}")  # Log the error
+        return ORJSONResponse(
+            {"message": "Error creating maintenances", "success": False}, status_code=500
+        )
+
+
+# Endpoint to update many maintenance records at once
+@router.post("/bulk-update-maintenances")
+async def bulk_update_maintenances_route(
+    maintenances: List[Any] = Body(..., max_length=Config.BULK_MAX_ITEMS),
+    organizationId: str = Header(...),
+    sessionId: str = Header(...),
+):
+    try:
+        # Validate every item, write them in bulk and report each one
+        result = await process_batch(
+            maintenances, Maintenance, organizationId, "maintenance_id", update_maintenances
+        )
+        if not result["success"]:
+            return ORJSONResponse(
+                {"message": "Maintenance update failed", "success": False},
+                status_code=500,
+            )
+        return ORJSONResponse(
+            {"message": result["message"], "success": True, "data": result["data"]}
+        )
+    except Exception as e:
+        logger.error(f"Error updating maintenances: {str(e)}")  # Log the error
+        return ORJSONResponse(
+            {"message": "Error updating maintenances", "success": False}, status_code=500
+        )
+
+
 # Endpoint to delete a maintenance record by its ID
 @router.delete("/delete-maintenance/{maintenanceId}")
 async def delete_maintenance_route(
@@ -161,7 +272,7 @@ async def delete_maintenance_route(
 ):
     try:
         if not maintenanceId:
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Missing maintenance ID", "success": False},
                 status_code=401,
             )
@@ -170,12 +281,12 @@ async def delete_maintenance_route(
         )
 
         if not maintenance:
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Error deleting maintenance", "success": False},
                 status_code=400,
             )
 
-        return JSONResponse(
+        return ORJSONResponse(
             {
                 "message": "Maintenance deleted",
                 "success": True,
@@ -184,7 +295,7 @@ async def delete_maintenance_route(
         )
     except Exception as e:
         logger.error(f"Error deleting maintenance: {str(e)}")
-        return JSONResponse(
+        return ORJSONResponse(
             {"message": "Error deleting maintenance", "success": False},
             status_code=500,
         )
@@ -1,8 +1,19 @@
 from fastapi import APIRouter, Header, WebSocket, WebSocketDisconnect, Query
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
+from fastapi.requests import Request
 from utils.logger import logger
-from models.publicPage import get_public_page_data
-from app.sockets.sockets import manager
+from models.publicPage import (
+    load_public_page_data,
+    publicPageData,
+    PUBLIC_PAGE_VIEWS,
+)
+from utils.projection import select_fields, InvalidProjectionError
+from typing import Optional
+from app.sockets.sockets import manager, IDLE_CLOSE_CODE
+from app.sockets.events import PONG_MESSAGE
+from config.config import Config
+from utils.etag import cached_etag_response, response_key
+import asyncio
 
 # Create a new APIRouter instance
 router = APIRouter()
@@ -16,24 +27,44 @@ async def root():
 
 # Define an endpoint to get public page data for a specific organization
 @router.get("/get-public-page-data/{organization_id}")
-async def get_public_page_data_route(organization_id: str):
+async def get_public_page_data_route(
+    request: Request,
+    organization_id: str,
+    fields: Optional[str] = None,
+    view: Optional[str] = None,
+):
     try:
-        # Fetch incidents data for the given organization_id
-        incidents = await get_public_page_data(organization_id)
-        if not incidents["success"]:
-            # Return a 404 response if fetching incidents failed
-            return JSONResponse(
-                {"message": "Incidents fetch failed", "success": False}, status_code=404
-            )
-
-        # Return the fetched incidents data
-        return JSONResponse(
-            {
+        # Only read the requested fields or named view from the database
+        selected = select_fields(
+            publicPageData.model_fields, PUBLIC_PAGE_VIEWS, fields, view
+        )
+
+        async def build():
+            # Fetch incidents data for the given organization_id
+            incidents = await load_public_page_data(organization_id, fields=selected)
+            if not incidents["success"]:
+                # Return a 404 response if fetching incidents failed
+                return ORJSONResponse(
+                    {"message": "Incidents fetch failed", "success": False},
+                    status_code=404,
+                )
+            return {
                 "message": "Incidents fetched successfully",
                 "data": incidents["data"],
                 "success": True,
             }
+
+        # Encoded once per version of the page and field selection; unchanged
+        # polls get the stored body, or an empty 304
+        return await cached_etag_response(
+            request,
+            organization_id,
+            response_key("public-page", selected),
+            build,
+            Config.PUBLIC_PAGE_CACHE_CONTROL,
         )
+    except InvalidProjectionError as e:
+        return ORJSONResponse({"message": str(e), "success": False}, status_code=400)
     except Exception as e:
         # Log the error and return a generic error message
         logger.error(f"An error occurred: {str(e)}")
@@ -42,13 +73,30 @@ async def get_public_page_data_route(organization_id: str):
 
 # Define a WebSocket endpoint for updates
 @router.websocket("/update")
-async def websocket_endpoint(websocket: WebSocket, organization_id: str = Query(...)):
+async def websocket_endpoint(
+    websocket: WebSocket,
+    organization_id: str = Query(...),
+    heartbeat: bool = Query(False),
+):
     # Connect the WebSocket client to the manager
-    await manager.connect(websocket, organization_id)
+    connection = await manager.connect(websocket, organization_id, heartbeat=heartbeat)
+    if connection is None:
+        # Rejected because a connection limit was reached
+        return
+
+    # Heartbeat clients must answer the server pings within the idle timeout
+    idle_timeout = Config.WS_IDLE_TIMEOUT_SECONDS if heartbeat else None
     try:
         while True:
             # Continuously receive data from the WebSocket
-            data = await websocket.receive_text()
+            data = await asyncio.wait_for(websocket.receive_text(), idle_timeout)
+            if data == "ping":
+                connection.enqueue(PONG_MESSAGE)
+    except asyncio.TimeoutError:
+        logger.info("Evicting idle WebSocket connection")
+        await manager.evict(websocket, code=IDLE_CLOSE_CODE, reason="Idle timeout")
     except WebSocketDisconnect:
-        # Disconnect the WebSocket client if the connection is closed
+        pass
+    finally:
+        # Disconnect the WebSocket client however the loop ended
         manager.disconnect(websocket)
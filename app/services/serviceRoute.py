@@ -1,14 +1,26 @@
 from fastapi import APIRouter
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from models.services import (
     create_service,
     ServiceSchema,
+    SERVICE_VIEWS,
+    create_services,
+    update_services,
     get_all_services,
+    iter_all_services,
     get_service_by_id,
     update_service,
     delete_service,
 )
-from fastapi import Header
+from fastapi import Body, Header, Query
+from typing import Any, List, Optional
+from fastapi.requests import Request
+from config.config import Config
+from utils.pagination import decode_cursor, InvalidCursorError
+from utils.bulk import process_batch
+from utils.projection import select_fields, InvalidProjectionError
+from utils.streaming import streaming_format, stream_documents
+from utils.etag import cached_etag_response, response_key
 from utils.logger import logger
 
 router = APIRouter()
@@ -22,25 +34,73 @@ async def root():
 
 # Endpoint to get all services for a given organization
 @router.get("/get-all-services/{organization_id}")
-async def get_all_services_route(organization_id: str):
+async def get_all_services_route(
+    request: Request,
+    organization_id: str,
+    limit: Optional[int] = Query(None, ge=1, le=Config.PAGINATION_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    stream: Optional[str] = Query(None, pattern="^(ndjson|json)$"),
+    fields: Optional[str] = None,
+    view: Optional[str] = None,
+):
     try:
         if not organization_id:
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Missing organization ID", "success": False},
                 status_code=401,
             )
-        services = await get_all_services(organization_id)
-        if not services:
-            return JSONResponse(
-                {"message": "No services found", "success": False}, status_code=404
+        # Only read the requested fields or named view from the database
+        selected = select_fields(
+            ServiceSchema.model_fields, SERVICE_VIEWS, fields, view
+        )
+        # Stream the whole listing when the client asks for it
+        stream_format = streaming_format(request, stream)
+        if stream_format:
+            return stream_documents(
+                iter_all_services(organization_id, fields=selected),
+                stream_format,
+                "Services found",
+            )
+        after = decode_cursor(cursor)
+
+        async def build():
+            # Fetch all services, or one page when paginating
+            services = await get_all_services(
+                organization_id, limit=limit, after=after, fields=selected
             )
+            if not services:
+                return ORJSONResponse(
+                    {"message": "No services found", "success": False}, status_code=404
+                )
 
-        return JSONResponse(
-            {"message": "Services found", "success": True, "data": services["data"]}
+            response = {
+                "message": "Services found",
+                "success": True,
+                "data": services["data"],
+            }
+            if limit is not None or cursor:
+                # Cursor for the next page, null on the last page
+                response["next_cursor"] = services["next_cursor"]
+            return response
+
+        # Encoded once per version of the organization's data, field selection
+        # and page; unchanged polls skip both the query and the encoding
+        return await cached_etag_response(
+            request,
+            organization_id,
+            response_key("services", selected, limit, cursor),
+            build,
+            Config.LIST_CACHE_CONTROL,
+        )
+    except InvalidCursorError:
+        return ORJSONResponse(
+            {"message": "Invalid cursor", "success": False}, status_code=400
         )
+    except InvalidProjectionError as e:
+        return ORJSONResponse({"message": str(e), "success": False}, status_code=400)
     except Exception as e:
         logger.error(f"Error fetching services: {str(e)}")
-        return JSONResponse(
+        return ORJSONResponse(
             {"message": "Error fetching services", "success": False}, status_code=500
         )
 
@@ -50,7 +110,7 @@ async def get_all_services_route(organization_id: str):
 async def get_service_route(organization_id: str, service_id: str):
     try:
         if not service_id:
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Missing service ID", "success": False},
                 status_code=401,
             )
@@ -58,16 +118,16 @@ async def get_service_route(organization_id: str, service_id: str):
             service_id=service_id, organization_id=organization_id
         )
         if not service:
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Service not found", "success": False}, status_code=404
             )
 
-        return JSONResponse(
+        return ORJSONResponse(
             {"message": "Service found", "success": True, "data": service["data"]}
         )
     except Exception as e:
         logger.error(f"Error fetching service: {str(e)}")
-        return JSONResponse(
+        return ORJSONResponse(
             {"message": "Error fetching service", "success": False}, status_code=500
         )
 
@@ -81,22 +141,22 @@ async def create_service_route(
 ):
     try:
         if not service:
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Missing service data", "success": False},
                 status_code=401,
             )
         service_created = await create_service(service)
         if service_created:
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Service created successfully", "success": True}
             )
         logger.error("Service creation failed")
-        return JSONResponse(
+        return ORJSONResponse(
             {"message": "Service creation failed", "success": False}, status_code=500
         )
     except Exception as e:
         logger.error(f"Error creating service: {str(e)}")
-        return JSONResponse(
+        return ORJSONResponse(
             {"message": "Error creating service", "success": False}, status_code=500
         )
 
@@ -110,7 +170,7 @@ async def update_service_route(
 ):
     try:
         if not service:
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Missing service data", "success": False},
                 status_code=401,
             )
@@ -118,20 +178,74 @@ async def update_service_route(
             service=service, organization_id=organizationId
         )
         if service_updated:
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Service updated successfully", "success": True}
             )
         logger.error("Service update failed")
-        return JSONResponse(
+        return ORJSONResponse(
             {"message": "Service update failed", "success": False}, status_code=500
         )
     except Exception as e:
         logger.error(f"Error updating service: {str(e)}")
-        return JSONResponse(
+        return ORJSONResponse(
             {"message": "Error updating service", "success": False}, status_code=500
         )
 
 
+# Endpoint to create many services at once
+@router.post("/bulk-create-services")
+async def bulk_create_services_route(
+    services: List[Any] = Body(..., max_length=Config.BULK_MAX_ITEMS),
+    organizationId: str = Header(...),
+    sessionId: str = Header(...),
+):
+    try:
+        # Validate every item, write them in bulk and report each one
+        result = await process_batch(
+            services, ServiceSchema, organizationId, "service_id", create_services
+        )
+        if not result["success"]:
+            return ORJSONResponse(
+                {"message": "Service creation failed", "success": False},
+                status_code=500,
+            )
+        return ORJSONResponse(
+            {"message": result["message"], "success": True, "data": result["data"]}
+        )
+    except Exception as e:
+        logger.error(f"Error creating services: {str(e)}")  # Log the error
+        return ORJSONResponse(
+            {"message": "Error creating services", "success": False}, status_code=500
+        )
+
+
+# Endpoint to update many services at once
+@router.post("/bulk-update-services")
+async def bulk_update_services_route(
+    services: List[Any] = Body(..., max_length=Config.BULK_MAX_ITEMS),
+    organizationId: str = Header(...),
+    sessionId: str = Header(...),
+):
+    try:
+        # Validate every item, write them in bulk and report each one
+        result = await process_batch(
+            services, ServiceSchema, organizationId, "service_id", update_services
+        )
+        if not result["success"]:
+            return ORJSONResponse(
+                {"message": "Service update failed", "success": False},
+                status_code=500,
+            )
+        return ORJSONResponse(
+            {"message": result["message"], "success": True, "data": result["data"]}
+        )
+    except Exception as e:
+        logger.error(f"Error updating services: {str(e)}")  # Log the error
+        return ORJSONResponse(
+            {"message": "Error updating services", "success": False}, status_code=500
+        )
+
+
 # Endpoint to delete a service by its ID
 @router.delete("/delete-service/{service_id}")
 async def delete_service_route(
@@ -139,7 +253,7 @@ async def delete_service_route(
 ):
     try:
         if not service_id:
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Missing service ID", "success": False},
                 status_code=401,
             )
@@ -148,15 +262,15 @@ async def delete_service_route(
             service_id=service_id, organization_id=organizationId
         )
         if service_deleted:
-            return JSONResponse(
+            return ORJSONResponse(
                 {"message": "Service deleted successfully", "success": True}
             )
         logger.error("Service deletion failed")
-        return JSONResponse(
+        return ORJSONResponse(
             {"message": "Service deletion failed", "success": False}, status_code=500
         )
     except Exception as e:
         logger.error(f"Error deleting service: {str(e)}")
-        return JSONResponse(
+        return ORJSONResponse(
             {"message": "Error deleting service", "success": False}, status_code=500
         )
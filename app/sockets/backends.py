@@ -0,0 +1,128 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+import pymongo
+from config.config import Config
+from utils.database import get_collection
+from utils.logger import logger
+
+# Identifies this worker process in events published through a shared backend
+WORKER_ID = uuid.uuid4().hex
+# Organization ID reserved for messages between workers; never sent to sockets
+CONTROL_CHANNEL = "$control"
+
+
+class BroadcastBackend:
+    """Carries broadcast messages to the local subscribers of every worker.
+
+    ``deliver(organization_id, message, remote)`` is called once per message on
+    each worker; ``remote`` is True when another worker published it.
+    """
+
+    deliver = None
+
+    def bind(self, deliver):
+        """Set the callback that hands messages to this worker's sockets."""
+        self.deliver = deliver
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(self, organization_id: str, message: str):
+        raise NotImplementedError
+
+
+class InMemoryBackend(BroadcastBackend):
+    """Single-process backend: messages only reach this worker's sockets."""
+
+    async def publish(self, organization_id: str, message: str):
+        await self.deliver(organization_id, message, False)
+
+
+class MongoChangeStreamBackend(BroadcastBackend):
+    """Cross-process backend built on a MongoDB change stream.
+
+    Each publish inserts one short-lived document into the events collection.
+    Every worker, the publisher included, watches inserts on that collection
+    and delivers each event to its own sockets exactly once. After a network
+    error the stream resumes from its last token, so nothing is skipped or
+    repeated. Change streams need a replica set or a sharded cluster.
+    """
+
+    def __init__(self, collection_name: str, ttl_seconds: int):
+        self.collection = get_collection(collection_name)
+        self.ttl_seconds = ttl_seconds
+        self._watcher: asyncio.Task = None
+
+    async def start(self):
+        # Events only matter while in flight, let MongoDB expire them
+        await self.collection.create_index(
+            "created_at", expireAfterSeconds=self.ttl_seconds
+        )
+        self._watcher = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._watcher:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+
+    async def publish(self, organization_id: str, message: str):
+        await self.collection.insert_one(
+            {
+                "organization_id": organization_id,
+                "message": message,
+                "origin": WORKER_ID,
+                "created_at": datetime.now(timezone.utc),
+            }
+        )
+
+    async def _watch(self):
+        resume_token = None
+        backoff = 0.5
+        while True:
+            try:
+                async with self.collection.watch(
+                    [{"$match": {"operationType": "insert"}}],
+                    resume_after=resume_token,
+                ) as stream:
+                    logger.info("Watching broadcast events")
+                    backoff = 0.5
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        event = change["fullDocument"]
+                        try:
+                            await self.deliver(
+                                event["organization_id"],
+                                event["message"],
+                                event.get("origin") != WORKER_ID,
+                            )
+                        except Exception as e:
+                            logger.error(f"Broadcast delivery failed: {str(e)}")
+            except asyncio.CancelledError:
+                raise
+            except pymongo.errors.PyMongoError as e:
+                logger.error(f"Broadcast change stream failed: {str(e)}")
+                if isinstance(e, pymongo.errors.OperationFailure):
+                    # The resume point may have left the oplog, start fresh
+                    resume_token = None
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+
+def create_backend(name: str) -> BroadcastBackend:
+    """Instantiate the broadcast backend selected by ``BROADCAST_BACKEND``."""
+    if name == "mongo":
+        return MongoChangeStreamBackend(
+            collection_name=Config.BROADCAST_EVENTS_COLLECTION,
+            ttl_seconds=Config.BROADCAST_EVENTS_TTL_SECONDS,
+        )
+    if name != "memory":
+        logger.error(f"Unknown broadcast backend {name}, using in-memory backend")
+    return InMemoryBackend()
@@ -0,0 +1,86 @@
+import asyncio
+from typing import Dict, List
+from utils.logger import logger
+
+
+class BroadcastCoalescer:
+    """Merges an organization's events that arrive within a short window.
+
+    The first event opens a window for its organization. Each later event
+    extends the window by ``window`` seconds, but the window never stays open
+    longer than ``max_delay`` seconds. When it closes, every collected event is
+    handed to ``flush(organization_id, events)`` in one call.
+    """
+
+    def __init__(self, window: float, max_delay: float, flush):
+        self.window = window
+        self.max_delay = max(max_delay, window)
+        self.flush = flush
+        self._pending: Dict[str, List[dict]] = {}
+        self._last_at: Dict[str, float] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.events_received = 0
+        self.messages_sent = 0
+        # Events folded into another event's message, counted when a window flushes
+        self.events_merged = 0
+
+    async def add(self, organization_id: str, event: dict):
+        self.events_received += 1
+        if self.window <= 0:
+            # Coalescing disabled, send right away
+            self.messages_sent += 1
+            await self.flush(organization_id, [event])
+            return
+
+        loop = asyncio.get_running_loop()
+        self._pending.setdefault(organization_id, []).append(event)
+        self._last_at[organization_id] = loop.time()
+        if organization_id not in self._tasks:
+            self._tasks[organization_id] = asyncio.create_task(
+                self._run(organization_id, opened_at=loop.time())
+            )
+
+    async def _run(self, organization_id: str, opened_at: float):
+        loop = asyncio.get_running_loop()
+        deadline = opened_at + self.max_delay
+        try:
+            while True:
+                # Wait for a quiet period, bounded by the maximum added latency
+                wait = min(self._last_at[organization_id] + self.window, deadline)
+                wait -= loop.time()
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+        finally:
+            self._tasks.pop(organization_id, None)
+            self._last_at.pop(organization_id, None)
+            events = self._pending.pop(organization_id, [])
+        if events:
+            self.messages_sent += 1
+            self.events_merged += len(events) - 1
+            try:
+                await self.flush(organization_id, events)
+            except Exception as e:
+                logger.error(f"Broadcast flush failed: {str(e)}")
+
+    async def drain(self):
+        """Flush every open window immediately, e.g. on shutdown."""
+        for task in list(self._tasks.values()):
+            task.cancel()
+        pending, self._pending = self._pending, {}
+        self._tasks.clear()
+        self._last_at.clear()
+        for organization_id, events in pending.items():
+            self.messages_sent += 1
+            self.events_merged += len(events) - 1
+            await self.flush(organization_id, events)
+
+    def stats(self):
+        return {
+            "window_seconds": self.window,
+            "max_delay_seconds": self.max_delay,
+            "events_received": self.events_received,
+            "messages_sent": self.messages_sent,
+            "events_merged": self.events_merged,
+            "open_windows": len(self._tasks),
+        }
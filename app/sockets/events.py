@@ -0,0 +1,52 @@
+import orjson
+from typing import Optional
+
+# Change events pushed to public page viewers
+INCIDENT_CREATED = "incident.created"
+INCIDENT_UPDATED = "incident.updated"
+INCIDENT_DELETED = "incident.deleted"
+MAINTENANCE_CREATED = "maintenance.created"
+MAINTENANCE_UPDATED = "maintenance.updated"
+MAINTENANCE_DELETED = "maintenance.deleted"
+SERVICE_CREATED = "service.created"
+SERVICE_UPDATED = "service.updated"
+SERVICE_DELETED = "service.deleted"
+ACTIVITY_CREATED = "activity.created"
+# Several events merged by the broadcast coalescer
+BATCH = "batch"
+# Worker-to-worker notice that an organization's memberships changed
+MEMBERSHIP_CHANGED = "membership.changed"
+# Application-level heartbeat for clients that opt in
+PING = "ping"
+PONG = "pong"
+
+
+def build_event(
+    event_type: str,
+    organization_id: str,
+    entity: Optional[dict] = None,
+    activity: Optional[dict] = None,
+) -> dict:
+    """Build a change event carrying the affected entity and its new activity."""
+    return {
+        "type": event_type,
+        "organization_id": organization_id,
+        "entity": entity,
+        "activity": activity,
+    }
+
+
+def build_batch(organization_id: str, events: list) -> dict:
+    """Wrap events that were coalesced into a single message."""
+    if len(events) == 1:
+        return events[0]
+    return {"type": BATCH, "organization_id": organization_id, "events": events}
+
+
+def encode_event(event: dict) -> str:
+    """Serialize an event once so every recipient shares the same payload."""
+    return orjson.dumps(event).decode()
+
+
+PING_MESSAGE = encode_event({"type": PING})
+PONG_MESSAGE = encode_event({"type": PONG})
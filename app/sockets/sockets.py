@@ -1,33 +1,203 @@
+import asyncio
+import orjson
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import Dict, List
+from typing import Dict, Set
+from config.config import Config
+from utils.logger import logger
+from app.sockets.events import (
+    build_event,
+    build_batch,
+    encode_event,
+    MEMBERSHIP_CHANGED,
+    PING_MESSAGE,
+)
+from app.sockets.coalescer import BroadcastCoalescer
+from app.sockets.backends import (
+    BroadcastBackend,
+    InMemoryBackend,
+    create_backend,
+    CONTROL_CHANNEL,
+)
+from app.clerk.clerk import invalidate_organization_membership
+from utils.cache import public_page_cache
+
+# Close code sent to clients that cannot keep up with the broadcast rate
+SLOW_CONSUMER_CLOSE_CODE = 1013  # Try Again Later
+# Close code sent when the connection limits are reached
+CAPACITY_CLOSE_CODE = 1013  # Try Again Later
+# Close code sent to heartbeat clients that stopped answering
+IDLE_CLOSE_CODE = 1000
+
+
+class Connection:
+    """A WebSocket with its own bounded outbound queue drained by a writer task."""
+
+    def __init__(
+        self, websocket: WebSocket, organization_id: str, manager, heartbeat=False
+    ):
+        self.websocket = websocket
+        self.organization_id = organization_id
+        self.manager = manager
+        # Whether the client takes part in the application-level heartbeat
+        self.heartbeat = heartbeat
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=Config.WS_SEND_QUEUE_SIZE)
+        self.writer: asyncio.Task = None
+        self.closing = False
+
+    def start(self):
+        self.writer = asyncio.create_task(self._write_loop())
+
+    def enqueue(self, message: str) -> bool:
+        """Queue a message without waiting; returns False if the queue is full."""
+        if self.closing:
+            return True
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def _write_loop(self):
+        try:
+            while True:
+                message = await self.queue.get()
+                await asyncio.wait_for(
+                    self.websocket.send_text(message),
+                    timeout=Config.WS_SEND_TIMEOUT_SECONDS,
+                )
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            logger.error("WebSocket send timed out, evicting connection")
+            await self.manager.evict(self.websocket)
+        except Exception as e:
+            logger.error(f"WebSocket send failed, evicting connection: {str(e)}")
+            await self.manager.evict(self.websocket)
+
+    def stop(self):
+        if self.writer and self.writer is not asyncio.current_task():
+            self.writer.cancel()
 
 
 class ConnectionManager:
     """Manages WebSocket connections grouped by organization."""
 
-    def __init__(self):
-        # Dictionary to store active WebSocket connections grouped by organization ID
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+    def __init__(self, backend: BroadcastBackend = None):
+        # Set of active connections per organization ID
+        self.active_connections: Dict[str, Set[Connection]] = {}
+        # Reverse index from each WebSocket to its connection
+        self.connections: Dict[WebSocket, Connection] = {}
+        # Backend carrying broadcasts to every worker's connections
+        self.backend = backend or InMemoryBackend()
+        self.backend.bind(self.deliver)
+        self._heartbeat_task: asyncio.Task = None
+        # Running eviction tasks; the event loop only keeps weak references
+        self._eviction_tasks: Set[asyncio.Task] = set()
+        # Merges bursts of events per organization before they are broadcast
+        self.coalescer = BroadcastCoalescer(
+            window=Config.BROADCAST_COALESCE_WINDOW_MS / 1000,
+            max_delay=Config.BROADCAST_COALESCE_MAX_DELAY_MS / 1000,
+            flush=self.publish_events,
+        )
+
+    async def start(self, backend: BroadcastBackend = None):
+        """Start the broadcast backend; call once the database client is up."""
+        if backend is not None:
+            self.backend = backend
+            self.backend.bind(self.deliver)
+        await self.backend.start()
+        self._heartbeat_task = asyncio.create_task(self._send_heartbeats())
+
+    async def stop(self):
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        await self.coalescer.drain()
+        await self.backend.stop()
+
+    async def _send_heartbeats(self):
+        """Ping every heartbeat client; those that stop answering time out."""
+        while True:
+            await asyncio.sleep(Config.WS_HEARTBEAT_INTERVAL_SECONDS)
+            for connection in list(self.connections.values()):
+                if connection.heartbeat and not connection.enqueue(PING_MESSAGE):
+                    self._evict_soon(connection)
 
-    async def connect(self, websocket: WebSocket, organization_id: str):
-        """Accept a WebSocket connection and group it by organization."""
+    async def connect(
+        self, websocket: WebSocket, organization_id: str, heartbeat: bool = False
+    ):
+        """Accept a WebSocket connection and group it by organization.
+
+        Returns None when a connection limit is reached; the socket is then
+        closed with a "try again later" code.
+        """
         await websocket.accept()  # Accept the WebSocket connection
-        if organization_id not in self.active_connections:
-            # Initialize the list for the organization if it doesn't exist
-            self.active_connections[organization_id] = []
-        # Add the WebSocket connection to the organization's list
-        self.active_connections[organization_id].append(websocket)
+        if (
+            len(self.connections) >= Config.WS_MAX_CONNECTIONS
+            or self.connection_count(organization_id)
+            >= Config.WS_MAX_CONNECTIONS_PER_ORG
+        ):
+            logger.error("WebSocket connection limit reached, rejecting connection")
+            await websocket.close(
+                code=CAPACITY_CLOSE_CODE, reason="Too many connections"
+            )
+            return None
+        # Register the connection in both indexes and start its writer
+        connection = Connection(websocket, organization_id, self, heartbeat=heartbeat)
+        self.connections[websocket] = connection
+        self.active_connections.setdefault(organization_id, set()).add(connection)
+        connection.start()
+        return connection
 
     def disconnect(self, websocket: WebSocket):
-        """Remove a WebSocket connection from the organization."""
-        for organization_id, connections in self.active_connections.items():
-            if websocket in connections:
-                # Remove the WebSocket connection from the organization's list
-                connections.remove(websocket)
-                if len(connections) == 0:
-                    # Remove the organization entry if no connections are left
-                    self.active_connections.pop(organization_id)
-                break
+        """Remove a WebSocket connection from the organization in O(1)."""
+        connection = self.connections.pop(websocket, None)
+        if connection is None:
+            return None
+        # Stop the writer and remove the connection from the organization's set
+        connection.stop()
+        connections = self.active_connections.get(connection.organization_id)
+        if connections is not None:
+            connections.discard(connection)
+            if not connections:
+                # Remove the organization entry if no connections are left
+                self.active_connections.pop(connection.organization_id)
+        return connection
+
+    def connection_count(self, organization_id: str = None) -> int:
+        """Live connections on this worker, for one organization or in total."""
+        if organization_id is None:
+            return len(self.connections)
+        return len(self.active_connections.get(organization_id, ()))
+
+    def connection_counts(self) -> Dict[str, int]:
+        """Live connections on this worker per organization."""
+        return {
+            organization_id: len(connections)
+            for organization_id, connections in self.active_connections.items()
+        }
+
+    async def evict(
+        self, websocket: WebSocket, code: int = SLOW_CONSUMER_CLOSE_CODE, reason=None
+    ):
+        """Drop a connection that cannot keep up or went idle and close its socket."""
+        if self.disconnect(websocket) is None:
+            return
+        try:
+            await asyncio.wait_for(
+                websocket.close(code=code, reason=reason),
+                timeout=Config.WS_SEND_TIMEOUT_SECONDS,
+            )
+        except Exception:
+            # The socket is already unusable
+            pass
+
+    def _evict_soon(self, connection: Connection):
+        """Evict a connection in the background without awaiting its close."""
+        connection.closing = True
+        task = asyncio.create_task(self.evict(connection.websocket))
+        self._eviction_tasks.add(task)
+        task.add_done_callback(self._eviction_tasks.discard)
 
     async def send_personal_message(self, message: str, websocket: WebSocket):
         """Send a message to a specific WebSocket connection."""
@@ -36,12 +206,63 @@ class ConnectionManager:
         )  # Send a text message to the WebSocket connection
 
     async def broadcast(self, message: str, organization_id: str):
-        """Broadcast a message to all active WebSocket connections in the organization."""
-        if organization_id in self.active_connections:
-            # Iterate through all connections in the organization and send the message
-            for connection in self.active_connections[organization_id]:
-                await connection.send_text(message)
+        """Broadcast a message to the organization's connections on every worker."""
+        await self.backend.publish(organization_id, message)
+
+    async def deliver(self, organization_id: str, message: str, remote: bool = False):
+        """Queue a message for every connection of the organization on this worker.
+
+        Slow clients are never awaited here: each connection's writer task
+        drains its own queue, and a client whose queue is full is evicted.
+        """
+        if organization_id == CONTROL_CHANNEL:
+            self._handle_control(orjson.loads(message))
+            return
+        if remote:
+            # Another worker changed this organization's data
+            public_page_cache.bump(organization_id)
+        overflowed = [
+            connection
+            for connection in self.active_connections.get(organization_id, ())
+            if not connection.enqueue(message)
+        ]
+        for connection in overflowed:
+            logger.error("WebSocket send queue full, evicting connection")
+            self._evict_soon(connection)
+
+    def _handle_control(self, event: dict):
+        """Apply a message another worker (or this one) sent to every worker."""
+        if event["type"] == MEMBERSHIP_CHANGED:
+            invalidate_organization_membership(event["organization_id"])
+
+    async def invalidate_memberships(self, organization_id: str = None):
+        """Drop cached memberships of one or all organizations on every worker."""
+        # Locally first, without waiting for the backend to hand the message back
+        invalidate_organization_membership(organization_id)
+        await self.backend.publish(
+            CONTROL_CHANNEL,
+            encode_event(build_event(MEMBERSHIP_CHANGED, organization_id)),
+        )
+
+    async def broadcast_event(
+        self,
+        event_type: str,
+        organization_id: str,
+        entity: dict = None,
+        activity: dict = None,
+    ):
+        """Broadcast a typed change event once its coalescing window closes."""
+        event = build_event(
+            event_type, organization_id, entity=entity, activity=activity
+        )
+        await self.coalescer.add(organization_id, event)
+
+    async def publish_events(self, organization_id: str, events: list):
+        """Broadcast coalesced events as one message, encoded once for all recipients."""
+        await self.broadcast(
+            encode_event(build_batch(organization_id, events)), organization_id
+        )
 
 
-# Instantiate the ConnectionManager
-manager = ConnectionManager()
+# Instantiate the ConnectionManager with the configured backend
+manager = ConnectionManager(create_backend(Config.BROADCAST_BACKEND))
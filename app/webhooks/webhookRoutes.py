@@ -0,0 +1,43 @@
+from fastapi import APIRouter
+from fastapi.requests import Request
+from fastapi.responses import ORJSONResponse
+from utils.logger import logger
+from app.clerk.clerk import verify_webhook_signature
+from app.sockets.sockets import manager
+
+router = APIRouter()  # Create a new APIRouter instance
+
+
+# Endpoint receiving Clerk webhook events signed with SIGNING_SECRET
+@router.post("/clerk")
+async def clerk_webhook_route(request: Request):
+    try:
+        body = await request.body()
+        if not verify_webhook_signature(request.headers, body):
+            logger.error("Invalid webhook signature")
+            return ORJSONResponse(
+                {"message": "Invalid signature", "success": False}, status_code=401
+            )
+
+        event = await request.json()
+        event_type = event.get("type", "")
+        data = event.get("data") or {}
+
+        # Membership changes only affect the organization they belong to; the
+        # webhook reaches one worker, which passes the change on to all of them
+        if event_type.startswith("organizationMembership."):
+            await manager.invalidate_memberships(
+                (data.get("organization") or {}).get("id")
+            )
+        elif event_type == "organization.deleted":
+            await manager.invalidate_memberships(data.get("id"))
+        elif event_type == "user.deleted":
+            # The user may have belonged to any organization
+            await manager.invalidate_memberships()
+
+        return ORJSONResponse({"message": "Webhook processed", "success": True})
+    except Exception as e:
+        logger.error(f"Error processing webhook: {str(e)}")
+        return ORJSONResponse(
+            {"message": "Error processing webhook", "success": False}, status_code=500
+        )
@@ -0,0 +1,101 @@
+"""Compare the old and new ways of encoding a large public page.
+
+The old path built each item with ``json.loads(publicPageData(...).json())``
+and encoded the result again with ``JSONResponse``. The new path builds plain
+dicts from the MongoDB documents and encodes them once with ``ORJSONResponse``.
+
+Run from the repository root:
+
+    python -m benchmarks.public_page_encoding [incidents] [activities_per_incident]
+"""
+
+import json
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta
+from fastapi.responses import JSONResponse, ORJSONResponse
+from models.publicPage import publicPageData
+from models.publicPageSnapshot import incident_entry
+
+
+def make_documents(incidents: int, activities_per_incident: int):
+    # Documents shaped like MongoDB returns them: naive UTC datetimes
+    now = datetime.utcnow().replace(microsecond=0)
+    documents = []
+    for i in range(incidents):
+        incident_id = str(uuid.uuid4())
+        incident = {
+            "incident_id": incident_id,
+            "organization_id": "org_benchmark",
+            "incident_name": f"Incident number {i}",
+            "incident_description": "Elevated error rates on the public API",
+            "incident_status": "Investigating",
+            "service_impacted": ["api", "dashboard"],
+            "created_at": now - timedelta(minutes=i),
+        }
+        activities = [
+            {
+                "activity_id": str(uuid.uuid4()),
+                "organization_id": "org_benchmark",
+                "action": "Investigating",
+                "activity_description": f"Update {j} on incident {i}",
+                "actor_id": incident_id,
+                "actor_type": "incident",
+                "timestamp": now - timedelta(minutes=i, seconds=j),
+            }
+            for j in range(activities_per_incident)
+        ]
+        documents.append((incident, activities))
+    return documents
+
+
+def old_path(documents):
+    # Per-document ISO copies, a pydantic round trip per item, then JSONResponse
+    data = []
+    for incident, activities in documents:
+        incident = {**incident, "created_at": incident["created_at"].isoformat()}
+        activities = [
+            {**activity, "timestamp": activity["timestamp"].isoformat()}
+            for activity in activities
+        ]
+        data.append(
+            json.loads(
+                publicPageData(
+                    incident_id=incident["incident_id"],
+                    organization_id=incident["organization_id"],
+                    incident_name=incident["incident_name"],
+                    incident_description=incident["incident_description"],
+                    incident_type="Incident",
+                    activities=activities,
+                    service_impacted=incident["service_impacted"],
+                    created_at=incident["created_at"],
+                ).json()
+            )
+        )
+    return JSONResponse({"message": "ok", "data": data, "success": True}).body
+
+
+def new_path(documents):
+    # Plain dicts straight from the documents, encoded once
+    data = [incident_entry(incident, activities) for incident, activities in documents]
+    return ORJSONResponse({"message": "ok", "data": data, "success": True}).body
+
+
+def main():
+    incidents = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    activities_per_incident = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    documents = make_documents(incidents, activities_per_incident)
+    assert json.loads(old_path(documents)) == json.loads(new_path(documents))
+
+    print(f"{incidents} incidents x {activities_per_incident} activities")
+    results = {}
+    for name, path in (("old", old_path), ("new", new_path)):
+        runs = timeit.repeat(lambda: path(documents), number=1, repeat=5)
+        results[name] = min(runs)
+        print(f"{name}: {results[name] * 1000:.1f} ms, {len(path(documents))} bytes")
+    print(f"speedup: {results['old'] / results['new']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
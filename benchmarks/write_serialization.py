@@ -0,0 +1,80 @@
+"""Measure the CPU cost of turning a validated model into a MongoDB document.
+
+Writers used to validate every model a second time and dump it, e.g.
+``IncidentModel(**incident.dict()).dict()``. They now call
+``utils.documents.to_document``, which only runs the model's compiled
+serializer.
+
+Run from the repository root:
+
+    python -m benchmarks.write_serialization [iterations]
+"""
+
+import sys
+import timeit
+from datetime import datetime, timezone
+from models.activity import ActivityModel
+from models.incident import IncidentModel
+from models.maintenance import Maintenance
+from models.services import ServiceSchema
+from utils.documents import to_document
+
+
+def sample_models():
+    now = datetime.now(timezone.utc)
+    return [
+        ActivityModel(
+            activity_id="activity-1",
+            organization_id="org_benchmark",
+            action="Investigating",
+            activity_description="Incident API outage updated with status Investigating",
+            actor_id="incident-1",
+            actor_type="incident",
+        ),
+        IncidentModel(
+            incident_id="incident-1",
+            service_impacted=["api", "dashboard"],
+            organization_id="org_benchmark",
+            incident_name="API outage",
+            incident_description="Elevated error rates on the public API",
+            incident_status="Investigating",
+        ),
+        Maintenance(
+            maintenance_id="maintenance-1",
+            service_impacted=["database"],
+            organization_id="org_benchmark",
+            maintenance_name="Database upgrade",
+            maintenance_description="Rolling upgrade of the primary cluster",
+            start_from=now,
+            end_at=now,
+        ),
+        ServiceSchema(
+            service_id="service-1",
+            organization_id="org_benchmark",
+            service_name="Public API",
+            service_description="REST API used by the dashboard",
+        ),
+    ]
+
+
+def revalidate(model):
+    # The old write path: validate the model again, then dump it
+    return type(model)(**model.model_dump()).model_dump()
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    for model in sample_models():
+        assert revalidate(model) == to_document(model)
+        old = min(timeit.repeat(lambda: revalidate(model), number=iterations, repeat=3))
+        new = min(timeit.repeat(lambda: to_document(model), number=iterations, repeat=3))
+        print(
+            f"{type(model).__name__:<14} "
+            f"old: {old / iterations * 1e6:6.2f} us/write  "
+            f"new: {new / iterations * 1e6:6.2f} us/write  "
+            f"speedup: {old / new:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
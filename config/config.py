@@ -9,4 +9,101 @@ class Config:
     CLERK_SECRET_KEY = os.getenv("CLERK_SECRET_KEY")
     CLERK_FRONTEND_API = os.getenv("CLERK_FRONTEND_API")
     DATABASE_URL = os.getenv("DATABASE_URL")
+    DATABASE_NAME = os.getenv("DATABASE_NAME", "Plivo")
     SIGNING_SECRET = os.getenv("SIGNING_SECRET")
+
+    # MongoDB connection pool and client tuning
+    MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+    MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+    MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "10000"))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "10000"))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "30000"))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(
+        os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "10000")
+    )
+    MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "")  # e.g. "zstd,snappy,zlib"
+    MONGO_READ_CONCERN = os.getenv("MONGO_READ_CONCERN")  # e.g. "local", "majority"
+    MONGO_WRITE_CONCERN = os.getenv("MONGO_WRITE_CONCERN")  # e.g. "1", "majority"
+    MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE")  # e.g. "primaryPreferred"
+    MONGO_ENSURE_INDEXES = os.getenv("MONGO_ENSURE_INDEXES", "true").lower() == "true"
+    # Commands slower than this are logged with their filter shape (0 disables it)
+    MONGO_SLOW_QUERY_MS = float(os.getenv("MONGO_SLOW_QUERY_MS", "100"))
+    # Also log the winning plan of slow commands, once per query shape and interval
+    MONGO_SLOW_QUERY_EXPLAIN = os.getenv("MONGO_SLOW_QUERY_EXPLAIN", "false").lower() == "true"
+    MONGO_SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS = float(
+        os.getenv("MONGO_SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS", "600")
+    )
+
+    # In-process cache for assembled public status pages
+    PUBLIC_PAGE_CACHE_TTL_SECONDS = float(os.getenv("PUBLIC_PAGE_CACHE_TTL_SECONDS", "60"))
+    PUBLIC_PAGE_CACHE_MAX_ENTRIES = int(os.getenv("PUBLIC_PAGE_CACHE_MAX_ENTRIES", "1024"))
+    # Most recent activities kept per entry, so a snapshot stays under MongoDB's 16 MB
+    PUBLIC_PAGE_MAX_ACTIVITIES = int(os.getenv("PUBLIC_PAGE_MAX_ACTIVITIES", "100"))
+
+    # Keyset pagination for list endpoints
+    PAGINATION_DEFAULT_LIMIT = int(os.getenv("PAGINATION_DEFAULT_LIMIT", "100"))
+    PAGINATION_MAX_LIMIT = int(os.getenv("PAGINATION_MAX_LIMIT", "1000"))
+
+    # Documents fetched per MongoDB round trip when streaming list responses
+    STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "500"))
+
+    # Cache of Clerk session verdicts used by the auth middleware
+    CLERK_SESSION_CACHE_TTL_SECONDS = float(os.getenv("CLERK_SESSION_CACHE_TTL_SECONDS", "60"))
+    CLERK_SESSION_NEGATIVE_TTL_SECONDS = float(
+        os.getenv("CLERK_SESSION_NEGATIVE_TTL_SECONDS", "5")
+    )
+    CLERK_SESSION_CACHE_MAX_ENTRIES = int(os.getenv("CLERK_SESSION_CACHE_MAX_ENTRIES", "10000"))
+
+    # Organization membership index refreshed from Clerk
+    CLERK_MEMBERSHIP_TTL_SECONDS = float(os.getenv("CLERK_MEMBERSHIP_TTL_SECONDS", "300"))
+    CLERK_MEMBERSHIP_MIN_REFRESH_SECONDS = float(
+        os.getenv("CLERK_MEMBERSHIP_MIN_REFRESH_SECONDS", "10")
+    )
+    CLERK_MEMBERSHIP_PAGE_SIZE = int(os.getenv("CLERK_MEMBERSHIP_PAGE_SIZE", "500"))
+    CLERK_WEBHOOK_TOLERANCE_SECONDS = int(os.getenv("CLERK_WEBHOOK_TOLERANCE_SECONDS", "300"))
+
+    # Per-connection WebSocket send queue
+    WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "64"))
+    WS_SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "5"))
+
+    # Broadcast backend: "memory" (single worker) or "mongo" (change streams across workers)
+    BROADCAST_BACKEND = os.getenv("BROADCAST_BACKEND", "memory")
+    BROADCAST_EVENTS_COLLECTION = os.getenv("BROADCAST_EVENTS_COLLECTION", "broadcast_events")
+    BROADCAST_EVENTS_TTL_SECONDS = int(os.getenv("BROADCAST_EVENTS_TTL_SECONDS", "60"))
+
+    # Per-organization broadcast coalescing (0 disables it)
+    BROADCAST_COALESCE_WINDOW_MS = int(os.getenv("BROADCAST_COALESCE_WINDOW_MS", "50"))
+    BROADCAST_COALESCE_MAX_DELAY_MS = int(os.getenv("BROADCAST_COALESCE_MAX_DELAY_MS", "250"))
+
+    # WebSocket liveness and capacity limits
+    WS_PING_INTERVAL_SECONDS = float(os.getenv("WS_PING_INTERVAL_SECONDS", "20"))
+    WS_PING_TIMEOUT_SECONDS = float(os.getenv("WS_PING_TIMEOUT_SECONDS", "20"))
+    WS_HEARTBEAT_INTERVAL_SECONDS = float(os.getenv("WS_HEARTBEAT_INTERVAL_SECONDS", "25"))
+    WS_IDLE_TIMEOUT_SECONDS = float(os.getenv("WS_IDLE_TIMEOUT_SECONDS", "75"))
+    WS_MAX_CONNECTIONS = int(os.getenv("WS_MAX_CONNECTIONS", "20000"))
+    WS_MAX_CONNECTIONS_PER_ORG = int(os.getenv("WS_MAX_CONNECTIONS_PER_ORG", "5000"))
+
+    # Cache-Control sent with ETag-validated GET responses
+    PUBLIC_PAGE_CACHE_CONTROL = os.getenv("PUBLIC_PAGE_CACHE_CONTROL", "public, max-age=5, stale-while-revalidate=30")
+    LIST_CACHE_CONTROL = os.getenv("LIST_CACHE_CONTROL", "public, no-cache")
+
+    # Token required in X-Health-Token by detailed health endpoints ("" disables them)
+    HEALTH_TOKEN = os.getenv("HEALTH_TOKEN", "")
+
+    # Largest number of items accepted by a bulk endpoint
+    BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "500"))
+    # Conditional updates a bulk update runs at once, so one batch cannot take the pool
+    BULK_UPDATE_CONCURRENCY = int(os.getenv("BULK_UPDATE_CONCURRENCY", "8"))
+
+    # Logging: "text" or "json" lines, size-rotated file ("" disables it)
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+    LOG_FILE = os.getenv("LOG_FILE", "app.log")
+    LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", "10485760"))
+    LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    # Per-logger levels as "name=LEVEL,...", applied over the defaults
+    LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+    # Keep one in N INFO records per call site (1 keeps them all)
+    LOG_INFO_SAMPLE_EVERY = int(os.getenv("LOG_INFO_SAMPLE_EVERY", "1"))
+    # Records waiting for the writer thread; further records are dropped
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
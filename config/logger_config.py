@@ -1,48 +1,146 @@
+import atexit
 import logging
+import queue
 from logging.config import dictConfig
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import orjson
+from config.config import Config
+from utils.metrics import registry
+
+# Default level of each configured logger; LOG_LEVELS overrides or adds entries
+DEFAULT_LEVELS = {
+    "myapp": "DEBUG",
+    "uvicorn": "INFO",
+    "uvicorn.error": "ERROR",
+}
+
+formats = {
+    "default": "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    "detailed": "%(asctime)s - %(name)s - %(levelname)s - %(message)s [in %(pathname)s:%(lineno)d]",
+}
+
+# Records are queued on the calling thread and written by the listener thread
+log_queue = queue.Queue(maxsize=Config.LOG_QUEUE_SIZE)
+_listener: QueueListener = None
+
+# Exported at /metrics, so records lost to a full queue do not go unnoticed
+dropped_records = registry.counter(
+    "log_records_dropped_total",
+    "Log records dropped because the log queue was full.",
+)
+dropped_records.inc(amount=0)
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats each record as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "logger": record.name,
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "path": record.pathname,
+            "line": record.lineno,
+        }
+        return orjson.dumps(entry, default=str).decode()
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps one in ``every`` INFO records per call site; other levels always pass."""
+
+    def __init__(self, every: int = 1):
+        super().__init__()
+        self.every = max(every, 1)
+        self._seen = {}
+
+    def filter(self, record):
+        if self.every == 1 or record.levelno != logging.INFO:
+            return True
+        site = (record.pathname, record.lineno)
+        count = self._seen.get(site, 0)
+        self._seen[site] = count + 1
+        return count % self.every == 0
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Hands records to the writer thread, dropping them when the queue is full."""
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Never block the event loop on a backed-up log writer
+            dropped_records.inc()
+
+
+def _queue_handler():
+    return DroppingQueueHandler(log_queue)
+
+
+def logger_levels(spec: str) -> dict:
+    """Parse ``name=LEVEL,...`` over the default logger levels."""
+    levels = dict(DEFAULT_LEVELS)
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def _output_handlers():
+    # The handlers doing the actual I/O, run on the listener thread
+    json_lines = Config.LOG_FORMAT == "json"
+    console = logging.StreamHandler()
+    console.setFormatter(
+        JsonFormatter() if json_lines else logging.Formatter(formats["default"])
+    )
+    handlers = [console]
+    if Config.LOG_FILE:
+        file = RotatingFileHandler(
+            Config.LOG_FILE,
+            maxBytes=Config.LOG_MAX_BYTES,
+            backupCount=Config.LOG_BACKUP_COUNT,
+            encoding="utf-8",
+            delay=True,
+        )
+        file.setFormatter(
+            JsonFormatter() if json_lines else logging.Formatter(formats["detailed"])
+        )
+        handlers.append(file)
+    return handlers
+
 
 log_config = {
     "version": 1,
     "disable_existing_loggers": False,
-    "formatters": {
-        "default": {
-            "format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        },
-        "detailed": {
-            "format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s [in %(pathname)s:%(lineno)d]",
-        },
+    "filters": {
+        "sampling": {"()": SamplingFilter, "every": Config.LOG_INFO_SAMPLE_EVERY},
     },
     "handlers": {
-        "console": {
-            "class": "logging.StreamHandler",
-            "formatter": "default",
-        },
-        "file": {
-            "class": "logging.FileHandler",
-            "formatter": "detailed",
-            "filename": "app.log",
-            "mode": "a",
-        },
+        "queue": {"()": _queue_handler, "filters": ["sampling"]},
     },
     "loggers": {
-        "myapp": {
-            "level": "DEBUG",
-            "handlers": ["console", "file"],
-            "propagate": False,
-        },
-        "uvicorn": {
-            "level": "INFO",
-            "handlers": ["console", "file"],
-            "propagate": False,
-        },
-        "uvicorn.error": {
-            "level": "ERROR",
-            "handlers": ["console", "file"],
-            "propagate": False,
-        },
+        name: {"level": level, "handlers": ["queue"], "propagate": False}
+        for name, level in logger_levels(Config.LOG_LEVELS).items()
     },
 }
 
 
 def setup_logging():
+    """Route the configured loggers through the queue and start the writer thread."""
+    global _listener
     dictConfig(log_config)
+    if _listener is None:
+        _listener = QueueListener(log_queue, *_output_handlers())
+        _listener.start()
+        # Flush whatever is still queued when the process exits
+        atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Write out the queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,15 +1,24 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
 from datetime import timezone
-from typing import Optional
+from typing import Dict, Optional
+import pymongo
+from pymongo import InsertOne
 from utils.logger import logger
-from utils.database import connect_to_mongodb
+from config.config import Config
+from utils.pagination import fetch_page
+from utils.bulk import bulk_write
+from utils.documents import to_document
+from utils.cache import public_page_cache
+from utils.database import get_collection
+from models import publicPageSnapshot
 from app.sockets.sockets import manager
+from app.sockets.events import ACTIVITY_CREATED
 
 
 # Define the ActivityModel using Pydantic for data validation
 class ActivityModel(BaseModel):
-    activity_id: str = Field(..., unique=True, min_length=1)
+    activity_id: str = Field(..., min_length=1)  # Unique per organization (index)
     organization_id: str = Field(..., min_length=1)
     action: str = Field(..., min_length=1, max_length=255)
     activity_description: str = Field(..., min_length=1, max_length=255)
@@ -20,24 +29,29 @@ class ActivityModel(BaseModel):
     )
 
 
-# Connect to the Plivo database
-db = connect_to_mongodb().Plivo
-
-# Fetch the activity collection
-activity_collection = db.activities
+# Fetch the activity collection from the shared database client
+activity_collection = get_collection("activities")
 
 
 # Function to create an activity
-async def create_activity(activity: ActivityModel):
+async def create_activity(
+    activity: ActivityModel, event_type: str = ACTIVITY_CREATED, entity: dict = None
+):
     try:
         # Insert the activity into the collection
-        created_activity = activity_collection.insert_one(
-            ActivityModel(**activity.model_dump()).model_dump()
-        )
-        print("Created Activity", created_activity)
+        document = to_document(activity)
+        created_activity = await activity_collection.insert_one(document)
         if created_activity:
-            # Send the activity to the socket
-            await manager.broadcast("update", organization_id=activity.organization_id)
+            # Add the activity to the snapshot and invalidate the cached public page
+            await publicPageSnapshot.add_activity(document)
+            public_page_cache.bump(activity.organization_id)
+            # Send the change event with the affected entity and activity to the socket
+            await manager.broadcast_event(
+                event_type,
+                activity.organization_id,
+                entity=entity,
+                activity=activity.model_dump(mode="json"),
+            )
             logger.info("Activity created successfully ")
             return {"success": True, "message": "Activity created successfully"}
         logger.error("Activity creation failed")
@@ -47,27 +61,80 @@ async def create_activity(activity: ActivityModel):
         return {"success": False, "message": f"An error occurred: {str(e)}"}
 
 
-# Function to get all activities for a specific organization
-async def get_all_activities(organization_id: str):
+# Function to create many activities with one bulk write
+async def create_activities(
+    activities: Dict[int, ActivityModel],
+    event_type: str = ACTIVITY_CREATED,
+    entities: Dict[int, dict] = None,
+):
+    """Insert activities keyed by batch index; returns the write errors by index."""
     try:
-        # Find activities by organization_id
-        activities = activity_collection.find(
-            {"organization_id": organization_id},
+        errors = await bulk_write(
+            activity_collection,
             {
-                "_id": 0,
+                index: InsertOne(to_document(activity))
+                for index, activity in activities.items()
             },
         )
-        if activities:
-            # Convert the cursor to a list of json objects
-            activities = [
-                {**activity, "timestamp": activity["timestamp"].isoformat()}
-                for activity in activities
-            ]
+        created = {
+            index: activity
+            for index, activity in activities.items()
+            if index not in errors
+        }
+        # Add the activities to the snapshots and invalidate the cached public pages
+        await publicPageSnapshot.add_activities(
+            [to_document(activity) for activity in created.values()]
+        )
+        for organization_id in {activity.organization_id for activity in created.values()}:
+            public_page_cache.bump(organization_id)
+        # Queued together, so the coalescer sends one message per organization
+        entities = entities or {}
+        for index, activity in created.items():
+            await manager.broadcast_event(
+                event_type,
+                activity.organization_id,
+                entity=entities.get(index),
+                activity=activity.model_dump(mode="json"),
+            )
+        return {
+            "success": True,
+            "message": "Activities created successfully",
+            "data": errors,
+        }
+    except Exception as e:
+        logger.error(f"An error occurred in creating Activities: {str(e)}")
+        return {"success": False, "message": f"An error occurred: {str(e)}"}
+
+
+# Function to get all activities for a specific organization
+async def get_all_activities(organization_id: str, limit: int = None, after=None):
+    try:
+        next_cursor = None
+        if limit is None and after is None:
+            # Find activities by organization_id
+            activities = await activity_collection.find(
+                {"organization_id": organization_id},
+                {
+                    "_id": 0,
+                },
+            ).to_list(length=None)
+        else:
+            # Fetch a single page in _id order
+            activities, next_cursor = await fetch_page(
+                activity_collection,
+                {"organization_id": organization_id},
+                limit=limit,
+                after=after,
+            )
+        # An empty result is still a successful fetch
+        if activities is not None:
+            # Datetimes are left as is, the response class encodes them
             logger.info("Activities fetched successfully")
             return {
                 "success": True,
                 "message": "Activities fetched successfully",
                 "data": activities,
+                "next_cursor": next_cursor,
             }
 
         logger.error("Failed to fetch activities")
@@ -77,6 +144,20 @@ async def get_all_activities(organization_id: str):
         return {"success": False, "message": f"An error occurred: {str(e)}"}
 
 
+# Function to stream all activities for a specific organization
+async def iter_all_activities(organization_id: str):
+    # Motor fetches the cursor in batches, so memory stays flat for any size
+    cursor = activity_collection.find(
+        {"organization_id": organization_id},
+        {
+            "_id": 0,
+        },
+        batch_size=Config.STREAM_BATCH_SIZE,
+    )
+    async for activity in cursor:
+        yield activity
+
+
 # Function to get activities by actor_id and organization_id
 async def get_activity_by_actor_id(actor_id: str, organization_id: str):
     try:
@@ -87,11 +168,8 @@ async def get_activity_by_actor_id(actor_id: str, organization_id: str):
                 "_id": 0,
             },
         )
-        # Convert the cursor to a list of json objects
-        activities = [
-            {**activity, "timestamp": activity["timestamp"].isoformat()}
-            for activity in cursor
-        ]
+        # Convert the cursor to a list of documents
+        activities = [activity async for activity in cursor]
         if activities:
             return {
                 "success": True,
@@ -104,3 +182,35 @@ async def get_activity_by_actor_id(actor_id: str, organization_id: str):
     except Exception as e:
         logger.error(f"An error occurred in fetching activity: {str(e)}")
         return {"success": False, "message": f"An error occurred: {str(e)}"}
+
+
+# Function to get activities for many actors of an organization in a single query
+async def get_activities_by_actor_ids(actor_ids: list[str], organization_id: str):
+    try:
+        # Index the activities by actor_id so callers can join them in O(1)
+        activities_by_actor = {actor_id: [] for actor_id in actor_ids}
+        if not actor_ids:
+            return {
+                "success": True,
+                "message": "Activities fetched successfully",
+                "data": activities_by_actor,
+            }
+
+        # Find activities for all actors in one round trip
+        cursor = activity_collection.find(
+            {"organization_id": organization_id, "actor_id": {"$in": actor_ids}},
+            {
+                "_id": 0,
+            },
+        ).sort([("timestamp", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)])
+        async for activity in cursor:
+            activities_by_actor[activity["actor_id"]].append(activity)
+
+        return {
+            "success": True,
+            "message": "Activities fetched successfully",
+            "data": activities_by_actor,
+        }
+    except Exception as e:
+        logger.error(f"An error occurred in fetching activities: {str(e)}")
+        return {"success": False, "message": f"An error occurred: {str(e)}"}
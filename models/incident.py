@@ -1,10 +1,24 @@
 # Import required libraries and modules
 from pydantic import BaseModel, Field
-from typing import List
+from typing import Dict, List
+from pymongo import InsertOne, ReturnDocument
 from datetime import datetime
-from utils.database import connect_to_mongodb
+from utils.database import get_collection
 from utils.logger import logger
-from models.activity import create_activity, ActivityModel
+from config.config import Config
+from utils.pagination import fetch_page
+from utils.projection import projection
+from utils.bulk import bulk_write, update_each
+from utils.documents import to_document
+from utils.cache import public_page_cache
+from models.activity import create_activity, create_activities, ActivityModel
+from models import publicPageSnapshot
+from app.sockets.sockets import manager
+from app.sockets.events import (
+    INCIDENT_CREATED,
+    INCIDENT_UPDATED,
+    INCIDENT_DELETED,
+)
 import uuid
 from typing import Optional
 from datetime import timezone
@@ -12,7 +26,7 @@ from datetime import timezone
 
 # Define Incident data model using Pydantic
 class IncidentModel(BaseModel):
-    incident_id: str = Field(..., unique=True)  # Unique identifier for each incident
+    incident_id: str = Field(...)  # Unique per organization (index)
     service_impacted: List[str] = Field(...)  # List of services affected by incident
     organization_id: str = Field(...)  # Organization identifier
     incident_name: str = Field(
@@ -27,31 +41,45 @@ class IncidentModel(BaseModel):
     )  # Timestamp of creation
 
 
-# Initialize database connection
-db = connect_to_mongodb().Plivo
-incident_collection = db.incidents
+# Named field selections for list views; "full" returns every field
+INCIDENT_VIEWS = {
+    "summary": ["incident_id", "incident_name", "incident_status", "created_at"]
+}
 
 
-async def get_all_incidents(organization_id: str):
+# Incidents collection on the shared database client
+incident_collection = get_collection("incidents")
+
+
+async def get_all_incidents(
+    organization_id: str, limit: int = None, after=None, fields: list = None
+):
     """Retrieve all incidents for a given organization"""
     try:
-        # Query database excluding MongoDB's _id field
-        incidents = incident_collection.find(
-            {"organization_id": organization_id},
-            {
-                "_id": 0,
-            },
-        )
-        if incidents:
-            # Convert datetime to ISO format for JSON serialization
-            incidents = [
-                {**incident, "created_at": incident["created_at"].isoformat()}
-                for incident in list(incidents)
-            ]
+        next_cursor = None
+        if limit is None and after is None:
+            # Query database excluding MongoDB's _id field
+            incidents = await incident_collection.find(
+                {"organization_id": organization_id},
+                projection(fields),
+            ).to_list(length=None)
+        else:
+            # Fetch a single page in _id order
+            incidents, next_cursor = await fetch_page(
+                incident_collection,
+                {"organization_id": organization_id},
+                limit=limit,
+                after=after,
+                fields=fields,
+            )
+        # An empty result is still a successful fetch
+        if incidents is not None:
+            # Datetimes are left as is, the response class encodes them
             return {
                 "success": True,
                 "data": incidents,
                 "message": "Incidents retrieved successfully",
+                "next_cursor": next_cursor,
             }
         logger.error("No incidents found")
         return {"success": False, "message": "No incidents found"}
@@ -61,18 +89,29 @@ async def get_all_incidents(organization_id: str):
         return {"success": False, "message": f"An error occurred: {str(e)}"}
 
 
+async def iter_all_incidents(organization_id: str, fields: list = None):
+    """Stream all incidents for a given organization, one batch at a time"""
+    # Motor fetches the cursor in batches, so memory stays flat for any size
+    cursor = incident_collection.find(
+        {"organization_id": organization_id},
+        projection(fields),
+        batch_size=Config.STREAM_BATCH_SIZE,
+    )
+    async for incident in cursor:
+        yield incident
+
+
 async def get_incident_by_id(incident_id: str, organization_id: str):
     """Retrieve a specific incident by ID"""
     try:
         # Find incident matching both incident_id and organization_id
-        incident = incident_collection.find_one(
+        incident = await incident_collection.find_one(
             {"incident_id": incident_id, "organization_id": organization_id},
             {
                 "_id": 0,
             },
         )
         if incident:
-            incident["created_at"] = incident["created_at"].isoformat()
             return {
                 "success": True,
                 "data": incident,
@@ -89,12 +128,17 @@ async def create_incident(incident: IncidentModel):
     """Create a new incident and log the activity"""
     try:
         # Insert new incident into database
-        created_incident = incident_collection.insert_one(
-            IncidentModel(**incident.dict()).dict()
-        )
+        document = to_document(incident)
+        created_incident = await incident_collection.insert_one(document)
         if not created_incident:
             logger.error("Incident creation failed")
             return {"success": False, "message": "Incident creation failed"}
+        # Add the incident to the organization's public page snapshot
+        await publicPageSnapshot.add_entry(
+            "incident", publicPageSnapshot.incident_entry(document)
+        )
+        # Invalidate the cached public page and listings
+        public_page_cache.bump(incident.organization_id)
 
         # Create an activity log for the new incident
         activity = await create_activity(
@@ -105,7 +149,9 @@ async def create_incident(incident: IncidentModel):
                 organization_id=incident.organization_id,
                 action=incident.incident_status,
                 activity_description=f"Incident {incident.incident_name} created with status {incident.incident_status}",
-            )
+            ),
+            event_type=INCIDENT_CREATED,
+            entity=incident.model_dump(mode="json"),
         )
 
         if activity["success"]:
@@ -121,16 +167,28 @@ async def create_incident(incident: IncidentModel):
 async def update_incident(incident: IncidentModel, organization_id: str):
     """Update an existing incident and log status changes"""
     try:
-        # Check if incident exists
-        current_incident = await get_incident_by_id(
-            incident.incident_id, organization_id
+        # Apply the update and read the previous status in one atomic round trip,
+        # so only one of several concurrent updates sees the status change
+        document = to_document(incident)
+        previous_incident = await incident_collection.find_one_and_update(
+            {"incident_id": incident.incident_id, "organization_id": organization_id},
+            {"$set": document},
+            projection={"_id": 0, "incident_status": 1},
+            return_document=ReturnDocument.BEFORE,
         )
-        if not current_incident["success"]:
+        if previous_incident is None:
             return {"success": False, "message": "Incident not found"}
-        current_incident = current_incident["data"]
+
+        # Refresh the snapshot entry and invalidate the cached public page
+        await publicPageSnapshot.update_entry(
+            "incident",
+            publicPageSnapshot.incident_entry(document),
+            organization_id,
+        )
+        public_page_cache.bump(organization_id)
 
         # Log activity if incident status has changed
-        if current_incident["incident_status"] != incident.incident_status:
+        if previous_incident["incident_status"] != incident.incident_status:
             activity = await create_activity(
                 ActivityModel(
                     activity_id=str(uuid.uuid4()),
@@ -139,23 +197,166 @@ async def update_incident(incident: IncidentModel, organization_id: str):
                     organization_id=organization_id,
                     action=incident.incident_status,
                     activity_description=f"Incident {incident.incident_name} updated with status {incident.incident_status}",
-                )
+                ),
+                event_type=INCIDENT_UPDATED,
+                entity=incident.model_dump(mode="json"),
             )
-
             if not activity["success"]:
                 return {"success": False, "message": "Incident update failed"}
+        else:
+            # No activity was logged, so send the change event here
+            await manager.broadcast_event(
+                INCIDENT_UPDATED,
+                organization_id,
+                entity=incident.model_dump(mode="json"),
+            )
+        return {"success": True, "message": "Incident updated successfully"}
+    except Exception as e:
+        logger.error(f"An error occurred in updating Incident: {str(e)}")
+        return {"success": False, "message": f"An error occurred: {str(e)}"}
 
-        # Update incident in database
-        updated_incident = incident_collection.update_one(
-            {"incident_id": incident.incident_id, "organization_id": organization_id},
-            {"$set": IncidentModel(**incident.dict()).dict()},
+
+async def create_incidents(incidents: Dict[int, IncidentModel], organization_id: str):
+    """Create many incidents with one bulk write and one batched activity insert.
+
+    ``incidents`` maps batch indexes to validated incidents; the error message
+    of every item that could not be created is returned by index.
+    """
+    try:
+        documents = {
+            index: to_document(incident) for index, incident in incidents.items()
+        }
+        errors = await bulk_write(
+            incident_collection,
+            {index: InsertOne(document) for index, document in documents.items()},
+        )
+        created = {
+            index: incident
+            for index, incident in incidents.items()
+            if index not in errors
+        }
+        # Add the incidents to the organization's public page snapshot
+        await publicPageSnapshot.add_entries(
+            "incident",
+            [
+                publicPageSnapshot.incident_entry(documents[index])
+                for index in created
+            ],
+            organization_id,
         )
-        if updated_incident:
-            return {"success": True, "message": "Incident updated successfully"}
-        logger.error("Incident update failed")
-        return {"success": False, "message": "Incident update failed"}
+        if created:
+            public_page_cache.bump(organization_id)
+
+        # Log one creation activity per incident in a single insert
+        activities = await create_activities(
+            {
+                index: ActivityModel(
+                    activity_id=str(uuid.uuid4()),
+                    actor_id=incident.incident_id,
+                    actor_type="incident",
+                    organization_id=incident.organization_id,
+                    action=incident.incident_status,
+                    activity_description=f"Incident {incident.incident_name} created with status {incident.incident_status}",
+                )
+                for index, incident in created.items()
+            },
+            event_type=INCIDENT_CREATED,
+            entities={
+                index: incident.model_dump(mode="json")
+                for index, incident in created.items()
+            },
+        )
+        if not activities["success"]:
+            return activities
+        for index in activities["data"]:
+            errors[index] = "Activity creation failed"
+        return {"success": True, "message": "Incidents processed", "data": errors}
     except Exception as e:
-        logger.error(f"An error occurred in updating Incident: {str(e)}")
+        logger.error(f"An error occurred in creating Incidents: {str(e)}")
+        return {"success": False, "message": f"An error occurred: {str(e)}"}
+
+
+async def update_incidents(incidents: Dict[int, IncidentModel], organization_id: str):
+    """Update many incidents atomically each, logging status changes in one insert.
+
+    ``incidents`` maps batch indexes to validated incidents; the error message
+    of every item that could not be updated is returned by index.
+    """
+    try:
+        # Apply each update atomically and read the status it replaced, so only
+        # one of several concurrent batches sees a given status change
+        documents = {
+            index: to_document(incident) for index, incident in incidents.items()
+        }
+        previous, errors = await update_each(
+            incident_collection,
+            {
+                index: (
+                    {
+                        "incident_id": incident.incident_id,
+                        "organization_id": organization_id,
+                    },
+                    {"$set": documents[index]},
+                )
+                for index, incident in incidents.items()
+            },
+            {"_id": 0, "incident_status": 1},
+        )
+        for index in incidents:
+            if index not in previous and index not in errors:
+                errors[index] = "Incident not found"
+        updated = {index: incidents[index] for index in previous}
+        # Refresh the snapshot entries and invalidate the cached public page
+        await publicPageSnapshot.update_entries(
+            "incident",
+            [
+                publicPageSnapshot.incident_entry(documents[index])
+                for index in updated
+            ],
+            organization_id,
+        )
+        if updated:
+            public_page_cache.bump(organization_id)
+
+        # Log the status changes in a single insert
+        status_changed = {
+            index: incident
+            for index, incident in updated.items()
+            if previous[index]["incident_status"] != incident.incident_status
+        }
+        activities = await create_activities(
+            {
+                index: ActivityModel(
+                    activity_id=str(uuid.uuid4()),
+                    actor_id=incident.incident_id,
+                    actor_type="incident",
+                    organization_id=organization_id,
+                    action=incident.incident_status,
+                    activity_description=f"Incident {incident.incident_name} updated with status {incident.incident_status}",
+                )
+                for index, incident in status_changed.items()
+            },
+            event_type=INCIDENT_UPDATED,
+            entities={
+                index: incident.model_dump(mode="json")
+                for index, incident in status_changed.items()
+            },
+        )
+        if not activities["success"]:
+            return activities
+        for index in activities["data"]:
+            errors[index] = "Activity creation failed"
+        for index, incident in updated.items():
+            if index not in status_changed:
+                # No activity was logged, so send the change event here
+                await manager.broadcast_event(
+                    INCIDENT_UPDATED,
+                    organization_id,
+                    entity=incident.model_dump(mode="json"),
+                )
+        return {"success": True, "message": "Incidents processed", "data": errors}
+    except Exception as e:
+        logger.error(f"An error occurred in updating Incidents: {str(e)}")
         return {"success": False, "message": f"An error occurred: {str(e)}"}
 
 
@@ -163,10 +364,18 @@ async def delete_incident(incident_id: str, organization_id: str):
     """Delete an incident from the database"""
     try:
         # Remove incident matching both incident_id and organization_id
-        deleted_incident = incident_collection.delete_one(
+        deleted_incident = await incident_collection.delete_one(
             {"incident_id": incident_id, "organization_id": organization_id}
         )
         if deleted_incident:
+            # Drop the snapshot entry and invalidate the cached public page
+            await publicPageSnapshot.remove_entry(
+                "incident", incident_id, organization_id
+            )
+            public_page_cache.bump(organization_id)
+            await manager.broadcast_event(
+                INCIDENT_DELETED, organization_id, entity={"incident_id": incident_id}
+            )
             return {"success": True, "message": "Incident deleted successfully"}
         logger.error("Incident deletion failed")
         return {"success": False, "message": "Incident deletion failed"}
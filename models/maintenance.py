@@ -1,15 +1,29 @@
 from pydantic import BaseModel, Field
-from typing import List
+from typing import Dict, List
+from pymongo import InsertOne, ReturnDocument
 from datetime import datetime
-from utils.database import connect_to_mongodb
+from utils.database import get_collection
 from utils.logger import logger
-from models.activity import create_activity, ActivityModel
+from config.config import Config
+from utils.pagination import fetch_page
+from utils.projection import projection
+from utils.bulk import bulk_write, update_each
+from utils.documents import to_document
+from utils.cache import public_page_cache
+from models.activity import create_activity, create_activities, ActivityModel
+from models import publicPageSnapshot
+from app.sockets.sockets import manager
+from app.sockets.events import (
+    MAINTENANCE_CREATED,
+    MAINTENANCE_UPDATED,
+    MAINTENANCE_DELETED,
+)
 import uuid
 
 
 # Define the Maintenance model using Pydantic
 class Maintenance(BaseModel):
-    maintenance_id: str = Field(..., unique=True)
+    maintenance_id: str = Field(...)  # Unique per organization (index)
     service_impacted: List[str] = Field(...)
     organization_id: str = Field(...)
     maintenance_name: str = Field(...)
@@ -19,35 +33,51 @@ class Maintenance(BaseModel):
     end_at: datetime = Field(...)
 
 
-# Connect to MongoDB and get the maintenances collection
-db = connect_to_mongodb().Plivo
-maintenance_collection = db.maintenances
+# Named field selections for list views; "full" returns every field
+MAINTENANCE_VIEWS = {
+    "summary": [
+        "maintenance_id",
+        "maintenance_name",
+        "maintenance_status",
+        "start_from",
+        "end_at",
+    ]
+}
+
+
+# Get the maintenances collection from the shared database client
+maintenance_collection = get_collection("maintenances")
 
 
 # Retrieve all maintenance records for a given organization
-async def get_all_maintenances(organization_id: str):
+async def get_all_maintenances(
+    organization_id: str, limit: int = None, after=None, fields: list = None
+):
     try:
-        # Query maintenances collection excluding MongoDB _id field
-        maintenances = maintenance_collection.find(
-            {"organization_id": organization_id},
-            {
-                "_id": 0,
-            },
-        )
-        if maintenances:
-            # Convert datetime objects to ISO format strings
-            maintenances = [
-                {
-                    **maintenance,
-                    "start_from": maintenance["start_from"].isoformat(),
-                    "end_at": maintenance["end_at"].isoformat(),
-                }
-                for maintenance in list(maintenances)
-            ]
+        next_cursor = None
+        if limit is None and after is None:
+            # Query maintenances collection excluding MongoDB _id field
+            maintenances = await maintenance_collection.find(
+                {"organization_id": organization_id},
+                projection(fields),
+            ).to_list(length=None)
+        else:
+            # Fetch a single page in _id order
+            maintenances, next_cursor = await fetch_page(
+                maintenance_collection,
+                {"organization_id": organization_id},
+                limit=limit,
+                after=after,
+                fields=fields,
+            )
+        # An empty result is still a successful fetch
+        if maintenances is not None:
+            # Datetimes are left as is, the response class encodes them
             return {
                 "success": True,
                 "data": maintenances,
                 "message": "Maintenances retrieved successfully",
+                "next_cursor": next_cursor,
             }
         logger.error("No maintenances found")
         return {"success": False, "message": "No maintenances found"}
@@ -57,20 +87,29 @@ async def get_all_maintenances(organization_id: str):
         return {"success": False, "message": f"An error occurred: {str(e)}"}
 
 
+# Stream all maintenance records for a given organization
+async def iter_all_maintenances(organization_id: str, fields: list = None):
+    # Motor fetches the cursor in batches, so memory stays flat for any size
+    cursor = maintenance_collection.find(
+        {"organization_id": organization_id},
+        projection(fields),
+        batch_size=Config.STREAM_BATCH_SIZE,
+    )
+    async for maintenance in cursor:
+        yield maintenance
+
+
 # Retrieve a specific maintenance record by ID and organization
 async def get_maintenance_by_id(maintenance_id: str, organization_id: str):
     try:
         # Query for specific maintenance record
-        maintenance = maintenance_collection.find_one(
+        maintenance = await maintenance_collection.find_one(
             {"maintenance_id": maintenance_id, "organization_id": organization_id},
             {
                 "_id": 0,
             },
         )
         if maintenance:
-            # Convert datetime objects to ISO format
-            maintenance["start_from"] = maintenance["start_from"].isoformat()
-            maintenance["end_at"] = maintenance["end_at"].isoformat()
             return {
                 "success": True,
                 "data": maintenance,
@@ -88,12 +127,18 @@ async def get_maintenance_by_id(maintenance_id: str, organization_id: str):
 async def create_maintenance(maintenance: Maintenance):
     try:
         # Insert new maintenance record
-        created_maintenance = maintenance_collection.insert_one(
-            Maintenance(**maintenance.model_dump()).model_dump()
-        )
+        document = to_document(maintenance)
+        created_maintenance = await maintenance_collection.insert_one(document)
         if not created_maintenance:
             logger.error("Maintenance creation failed")
             return {"success": False, "message": "Maintenance creation failed"}
+        # Add the maintenance to the organization's public page snapshot
+        await publicPageSnapshot.add_entry(
+            "maintenance",
+            publicPageSnapshot.maintenance_entry(document),
+        )
+        # Invalidate the cached public page and listings
+        public_page_cache.bump(maintenance.organization_id)
 
         # Create an activity log for the new maintenance
         activity = await create_activity(
@@ -104,7 +149,9 @@ async def create_maintenance(maintenance: Maintenance):
                 activity_description=f"New maintenance {maintenance.maintenance_name} created",
                 actor_id=maintenance.maintenance_id,
                 action=maintenance.maintenance_status,
-            )
+            ),
+            event_type=MAINTENANCE_CREATED,
+            entity=maintenance.model_dump(mode="json"),
         )
 
         if activity["success"]:
@@ -124,17 +171,31 @@ async def create_maintenance(maintenance: Maintenance):
 # Update an existing maintenance record and log status changes
 async def update_maintenance(maintenance: Maintenance, organization_id: str):
     try:
-        # Verify maintenance exists
-        current_maintenance = await get_maintenance_by_id(
-            maintenance.maintenance_id, organization_id
+        # Apply the update and read the previous status in one atomic round trip,
+        # so only one of several concurrent updates sees the status change
+        document = to_document(maintenance)
+        previous_maintenance = await maintenance_collection.find_one_and_update(
+            {
+                "maintenance_id": maintenance.maintenance_id,
+                "organization_id": organization_id,
+            },
+            {"$set": document},
+            projection={"_id": 0, "maintenance_status": 1},
+            return_document=ReturnDocument.BEFORE,
         )
-        if not current_maintenance["success"]:
-            return current_maintenance
+        if previous_maintenance is None:
+            return {"success": False, "message": "Maintenance not found"}
 
-        current_maintenance = current_maintenance["data"]
+        # Refresh the snapshot entry and invalidate the cached public page
+        await publicPageSnapshot.update_entry(
+            "maintenance",
+            publicPageSnapshot.maintenance_entry(document),
+            organization_id,
+        )
+        public_page_cache.bump(organization_id)
 
         # Create activity log if maintenance status has changed
-        if current_maintenance["maintenance_status"] != maintenance.maintenance_status:
+        if previous_maintenance["maintenance_status"] != maintenance.maintenance_status:
             activity = await create_activity(
                 ActivityModel(
                     activity_id=str(uuid.uuid4()),
@@ -143,28 +204,180 @@ async def update_maintenance(maintenance: Maintenance, organization_id: str):
                     organization_id=organization_id,
                     action=maintenance.maintenance_status,
                     activity_description=f"Maintenance {maintenance.maintenance_name} updated with status {maintenance.maintenance_status}",
-                )
+                ),
+                event_type=MAINTENANCE_UPDATED,
+                entity=maintenance.model_dump(mode="json"),
             )
 
             if not activity["success"]:
                 logger.error("Activity creation failed")
                 return {"success": False, "message": "Activity creation failed"}
+        else:
+            # No activity was logged, so send the change event here
+            await manager.broadcast_event(
+                MAINTENANCE_UPDATED,
+                organization_id,
+                entity=maintenance.model_dump(mode="json"),
+            )
+        return {
+            "success": True,
+            "message": "Maintenance updated successfully",
+        }
+
+    except Exception as e:
+        logger.error(f"An error occurred in updating maintenance: {str(e)}")
+        return {"success": False, "message": f"An error occurred: {str(e)}"}
+
 
-        # Update maintenance record
-        updated_maintenance = maintenance_collection.update_one(
-            {"maintenance_id": maintenance.maintenance_id},
-            {"$set": Maintenance(**maintenance.dict()).dict()},
+# Create many maintenance records with their activities in batched writes,
+# keyed by batch index; returns the error of every item that was not created
+async def create_maintenances(
+    maintenances: Dict[int, Maintenance], organization_id: str
+):
+    try:
+        documents = {
+            index: to_document(maintenance)
+            for index, maintenance in maintenances.items()
+        }
+        errors = await bulk_write(
+            maintenance_collection,
+            {index: InsertOne(document) for index, document in documents.items()},
         )
-        if updated_maintenance:
-            return {
-                "success": True,
-                "message": "Maintenance updated successfully",
-            }
-        logger.error("Maintenance update failed")
-        return {"success": False, "message": "Maintenance update failed"}
+        created = {
+            index: maintenance
+            for index, maintenance in maintenances.items()
+            if index not in errors
+        }
+        # Add the maintenances to the organization's public page snapshot
+        await publicPageSnapshot.add_entries(
+            "maintenance",
+            [
+                publicPageSnapshot.maintenance_entry(documents[index])
+                for index in created
+            ],
+            organization_id,
+        )
+        if created:
+            public_page_cache.bump(organization_id)
+
+        # Log one creation activity per maintenance in a single insert
+        activities = await create_activities(
+            {
+                index: ActivityModel(
+                    activity_id=str(uuid.uuid4()),
+                    actor_id=maintenance.maintenance_id,
+                    actor_type="maintenance",
+                    organization_id=maintenance.organization_id,
+                    action=maintenance.maintenance_status,
+                    activity_description=f"New maintenance {maintenance.maintenance_name} created",
+                )
+                for index, maintenance in created.items()
+            },
+            event_type=MAINTENANCE_CREATED,
+            entities={
+                index: maintenance.model_dump(mode="json")
+                for index, maintenance in created.items()
+            },
+        )
+        if not activities["success"]:
+            return activities
+        for index in activities["data"]:
+            errors[index] = "Activity creation failed"
+        return {
+            "success": True,
+            "message": "Maintenance records processed",
+            "data": errors,
+        }
+    except Exception as e:
+        logger.error(f"An error occurred in creating maintenances: {str(e)}")
+        return {"success": False, "message": f"An error occurred: {str(e)}"}
+
+
+# Update many maintenance records and log their status changes in batched writes,
+# keyed by batch index; returns the error of every item that was not updated
+async def update_maintenances(
+    maintenances: Dict[int, Maintenance], organization_id: str
+):
+    try:
+        # Apply each update atomically and read the status it replaced, so only
+        # one of several concurrent batches sees a given status change
+        documents = {
+            index: to_document(maintenance)
+            for index, maintenance in maintenances.items()
+        }
+        previous, errors = await update_each(
+            maintenance_collection,
+            {
+                index: (
+                    {
+                        "maintenance_id": maintenance.maintenance_id,
+                        "organization_id": organization_id,
+                    },
+                    {"$set": documents[index]},
+                )
+                for index, maintenance in maintenances.items()
+            },
+            {"_id": 0, "maintenance_status": 1},
+        )
+        for index in maintenances:
+            if index not in previous and index not in errors:
+                errors[index] = "Maintenance not found"
+        updated = {index: maintenances[index] for index in previous}
+        # Refresh the snapshot entries and invalidate the cached public page
+        await publicPageSnapshot.update_entries(
+            "maintenance",
+            [
+                publicPageSnapshot.maintenance_entry(documents[index])
+                for index in updated
+            ],
+            organization_id,
+        )
+        if updated:
+            public_page_cache.bump(organization_id)
 
+        # Log the status changes in a single insert
+        status_changed = {
+            index: maintenance
+            for index, maintenance in updated.items()
+            if previous[index]["maintenance_status"] != maintenance.maintenance_status
+        }
+        activities = await create_activities(
+            {
+                index: ActivityModel(
+                    activity_id=str(uuid.uuid4()),
+                    actor_id=maintenance.maintenance_id,
+                    actor_type="maintenance",
+                    organization_id=organization_id,
+                    action=maintenance.maintenance_status,
+                    activity_description=f"Maintenance {maintenance.maintenance_name} updated with status {maintenance.maintenance_status}",
+                )
+                for index, maintenance in status_changed.items()
+            },
+            event_type=MAINTENANCE_UPDATED,
+            entities={
+                index: maintenance.model_dump(mode="json")
+                for index, maintenance in status_changed.items()
+            },
+        )
+        if not activities["success"]:
+            return activities
+        for index in activities["data"]:
+            errors[index] = "Activity creation failed"
+        for index, maintenance in updated.items():
+            if index not in status_changed:
+                # No activity was logged, so send the change event here
+                await manager.broadcast_event(
+                    MAINTENANCE_UPDATED,
+                    organization_id,
+                    entity=maintenance.model_dump(mode="json"),
+                )
+        return {
+            "success": True,
+            "message": "Maintenance records processed",
+            "data": errors,
+        }
     except Exception as e:
-        logger.error(f"An error occurred in updating maintenance: {str(e)}")
+        logger.error(f"An error occurred in updating maintenances: {str(e)}")
         return {"success": False, "message": f"An error occurred: {str(e)}"}
 
 
@@ -172,10 +385,20 @@ async def update_maintenance(maintenance: Maintenance, organization_id: str):
 async def delete_maintenance(maintenance_id: str, organization_id: str):
     try:
         # Remove maintenance record
-        deleted_maintenance = maintenance_collection.delete_one(
+        deleted_maintenance = await maintenance_collection.delete_one(
             {"maintenance_id": maintenance_id, "organization_id": organization_id}
         )
         if deleted_maintenance:
+            # Drop the snapshot entry and invalidate the cached public page
+            await publicPageSnapshot.remove_entry(
+                "maintenance", maintenance_id, organization_id
+            )
+            public_page_cache.bump(organization_id)
+            await manager.broadcast_event(
+                MAINTENANCE_DELETED,
+                organization_id,
+                entity={"maintenance_id": maintenance_id},
+            )
             return {
                 "success": True,
                 "message": "Maintenance deleted successfully",
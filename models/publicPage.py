@@ -1,16 +1,16 @@
 from pydantic import BaseModel, Field
-from models.activity import ActivityModel, get_activity_by_actor_id
-from utils.database import connect_to_mongodb
+from models.activity import ActivityModel, get_activities_by_actor_ids
+from utils.database import get_collection
 from utils.logger import logger
+from models import publicPageSnapshot
 from models.incident import get_all_incidents
 from models.maintenance import get_all_maintenances
 from datetime import datetime
 import asyncio
-import json
 
 
 class publicPageData(BaseModel):
-    incident_id: str = Field(..., unique=True)  # Unique service ID
+    incident_id: str = Field(...)  # ID of the incident or maintenance
     organization_id: str  # ID of the organization
     incident_name: str = Field(..., min_length=5, max_length=255)  # Name of the service
     incident_description: str = Field(
@@ -22,155 +22,144 @@ class publicPageData(BaseModel):
     created_at: datetime
 
 
-# Connect to MongoDB and get collections
-db = connect_to_mongodb().Plivo
-incidents_collection = db.incidents
-activity_collection = db.activities
-maintenance_collection = db.maintenance
+# Named field selections for the public page; "full" returns every field
+PUBLIC_PAGE_VIEWS = {
+    "summary": ["incident_id", "incident_name", "incident_type", "created_at"]
+}
 
 
-async def get_incidents_with_activities(organization_id: str):
-    try:
-        # Fetch all incidents for the organization
-        incidents = await get_all_incidents(organization_id)
-        if not incidents["success"]:
-            return {"success": False, "message": "Incidents fetch failed"}
+# Get collections from the shared database client
+incidents_collection = get_collection("incidents")
+maintenance_collection = get_collection("maintenances")
 
-        incidents_data = incidents["data"]
 
-        async def fetch_activities(incident):
-            # Fetch activities for a specific incident
-            activities = await get_activity_by_actor_id(
-                incident["incident_id"], organization_id=organization_id
-            )
-            if not activities["success"]:
-                return None
-            return {
-                "incident_id": incident["incident_id"],
-                "activities": activities["data"],
-            }
-
-        # Fetch all activities concurrently
-        activities_tasks = [fetch_activities(incident) for incident in incidents_data]
-        activities_results = await asyncio.gather(*activities_tasks)
-
-        # Update incidents with their activities
-        for result in activities_results:
-            if result is None:
-                return {"success": False, "message": "Activities fetch failed"}
-            for incident in incidents_data:
-                if incident["incident_id"] == result["incident_id"]:
-                    incident["activities"] = result["activities"]
-
-        # Convert the date to ISO string in activities
-        for incident in incidents_data:
-            for activity in incident["activities"]:
-                activity["timestamp"] = activity["timestamp"]
-
-        # Convert the output into the desired format
-        incidents_data = [
-            json.loads(
-                publicPageData(
-                    incident_id=incident["incident_id"],
-                    organization_id=incident["organization_id"],
-                    incident_name=incident["incident_name"],
-                    incident_description=incident["incident_description"],
-                    incident_type="Incident",
-                    activities=incident["activities"],
-                    service_impacted=incident["service_impacted"],
-                    created_at=incident["created_at"],
-                ).json()
-            )
-            for incident in incidents_data
-        ]
-        return {"success": True, "data": incidents_data}
-
-    except Exception as e:
-        logger.error(f"An error occurred in fetching Incidents: {str(e)}")
-        return {"success": False, "message": f"An error occurred: {str(e)}"}
+async def rebuild_public_page(organization_id: str):
+    """Assemble the organization's public page from the collections and store it."""
+    try:
+        # Read the generation first; every write advances it in MongoDB before
+        # patching, so a write landing during the rebuild is seen by all workers
+        generation = await publicPageSnapshot.get_generation(organization_id)
 
+        # Run both fetches concurrently
+        incidents_result, maintenance_result = await asyncio.gather(
+            get_all_incidents(organization_id), get_all_maintenances(organization_id)
+        )
 
-async def get_maintenance_with_activities(organization_id: str):
-    try:
-        # Fetch all maintenance records for the organization
-        maintenance = await get_all_maintenances(organization_id)
-        if not maintenance["success"]:
+        if not incidents_result["success"]:
+            return {"success": False, "message": "Incidents fetch failed"}
+        if not maintenance_result["success"]:
             return {"success": False, "message": "Maintenance fetch failed"}
 
-        maintenance_data = maintenance["data"]
+        incidents_data = incidents_result["data"]
+        maintenance_data = maintenance_result["data"]
 
-        async def fetch_activities(maintenance):
-            # Fetch activities for a specific maintenance record
-            activities = await get_activity_by_actor_id(
-                maintenance["maintenance_id"], organization_id=organization_id
+        # Fetch the activities of every incident and maintenance in one query
+        activities = await get_activities_by_actor_ids(
+            [incident["incident_id"] for incident in incidents_data]
+            + [maintenance["maintenance_id"] for maintenance in maintenance_data],
+            organization_id=organization_id,
+        )
+        if not activities["success"]:
+            return {"success": False, "message": "Activities fetch failed"}
+        activities_by_actor = activities["data"]
+
+        # Join both record types with their activities
+        incidents = [
+            publicPageSnapshot.incident_entry(
+                incident, activities_by_actor[incident["incident_id"]]
             )
-            if not activities["success"]:
-                return None
-            return {
-                "maintenance_id": maintenance["maintenance_id"],
-                "activities": activities["data"],
-            }
-
-        # Fetch all activities concurrently
-        activities_tasks = [
-            fetch_activities(maintenance) for maintenance in maintenance_data
+            for incident in incidents_data
         ]
-        activities_results = await asyncio.gather(*activities_tasks)
-
-        # Update maintenance records with their activities
-        for result in activities_results:
-            if result is None:
-                return {"success": False, "message": "Activities fetch failed"}
-            for maintenance in maintenance_data:
-                if maintenance["maintenance_id"] == result["maintenance_id"]:
-                    maintenance["activities"] = result["activities"]
-
-        # Convert the date to ISO string in activities
-        for maintenance in maintenance_data:
-            for activity in maintenance["activities"]:
-                activity["timestamp"] = activity["timestamp"]
-
-        # Convert the output into the desired format
-        maintenance_data = [
-            json.loads(
-                publicPageData(
-                    incident_id=maintenance["maintenance_id"],
-                    organization_id=maintenance["organization_id"],
-                    incident_name=maintenance["maintenance_name"],
-                    incident_description=maintenance["maintenance_description"],
-                    incident_type="Maintenance",
-                    activities=maintenance["activities"],
-                    created_at=maintenance["start_from"],
-                    service_impacted=maintenance["service_impacted"],
-                ).json()
+        maintenances = [
+            publicPageSnapshot.maintenance_entry(
+                maintenance, activities_by_actor[maintenance["maintenance_id"]]
             )
             for maintenance in maintenance_data
         ]
-        return {"success": True, "data": maintenance_data}
-
+        stored = await store_public_page(
+            organization_id, generation, incidents, maintenances
+        )
+        return {"success": True, "data": incidents + maintenances, "stored": stored}
     except Exception as e:
-        logger.error(f"An error occurred in fetching Maintenance: {str(e)}")
+        logger.error(f"An error occurred in rebuilding Public Page Data: {str(e)}")
         return {"success": False, "message": f"An error occurred: {str(e)}"}
 
 
-async def get_public_page_data(organization_id: str):
+async def store_public_page(
+    organization_id: str, generation, incidents: list, maintenances: list
+) -> bool:
+    """Store a rebuilt page; returns whether the snapshot now matches it.
+
+    The page is served whether or not this succeeds, so errors are only logged.
+    """
     try:
-        # Run both fetches concurrently
-        incidents_task = get_incidents_with_activities(organization_id)
-        maintenance_task = get_maintenance_with_activities(organization_id)
-        incidents_result, maintenance_result = await asyncio.gather(
-            incidents_task, maintenance_task
+        if not incidents and not maintenances:
+            # Nothing to store: unknown organization IDs sent to the public GET
+            # must not leave documents behind, the first write creates one
+            await publicPageSnapshot.drop_snapshot(organization_id, generation)
+            return True
+        # Not stored if a write landed while reading, the next read rebuilds it
+        return await publicPageSnapshot.save_snapshot(
+            organization_id, generation, incidents, maintenances
         )
+    except Exception as e:
+        logger.error(f"An error occurred in storing Public Page snapshot: {str(e)}")
+        return False
 
-        if not incidents_result["success"]:
-            return {"success": False, "message": "Incidents fetch failed"}
-        if not maintenance_result["success"]:
-            return {"success": False, "message": "Maintenance fetch failed"}
-
-        # Combine the results
-        combined_data = incidents_result["data"] + maintenance_result["data"]
 
-        return {"success": True, "data": combined_data}
+async def load_public_page_data(organization_id: str, fields: list = None):
+    try:
+        # A single indexed document fetch, however long the organization's history
+        snapshot = await publicPageSnapshot.get_snapshot(organization_id, fields)
+        if snapshot is None:
+            # Never built (or discarded after a failed update), build it now
+            result = await rebuild_public_page(organization_id)
+            if result["success"] and fields is not None:
+                result["data"] = [
+                    {name: entry[name] for name in fields if name in entry}
+                    for entry in result["data"]
+                ]
+            return result
+        return {
+            "success": True,
+            "data": snapshot["incidents"] + snapshot["maintenances"],
+        }
     except Exception as e:
         logger.error(f"An error occurred in fetching Public Page Data: {str(e)}")
         return {"success": False, "message": f"An error occurred: {str(e)}"}
+
+
+async def rebuild_all_public_pages(organization_ids: list = None):
+    """Rebuild the snapshots of the given organizations, or of every organization."""
+    if not organization_ids:
+        organization_ids = set(
+            await incidents_collection.distinct("organization_id")
+        ) | set(await maintenance_collection.distinct("organization_id"))
+        # Snapshots of organizations without any record left are dropped
+        organization_ids |= set(
+            await publicPageSnapshot.public_pages_collection.distinct("organization_id")
+        )
+    failed = 0
+    for organization_id in sorted(organization_ids):
+        result = await rebuild_public_page(organization_id)
+        if result["success"] and result["stored"]:
+            logger.info(f"Rebuilt public page of {organization_id}")
+        else:
+            failed += 1
+            logger.error(f"Rebuilding public page of {organization_id} failed")
+    return failed
+
+
+# Repair drifted snapshots: python -m models.publicPage [organization_id ...]
+if __name__ == "__main__":
+    import sys
+    from utils.database import connect_to_mongodb, close_mongodb_connection
+
+    async def main():
+        connect_to_mongodb()
+        try:
+            return await rebuild_all_public_pages(sys.argv[1:])
+        finally:
+            close_mongodb_connection()
+
+    sys.exit(1 if asyncio.run(main()) else 0)
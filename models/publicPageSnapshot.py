@@ -0,0 +1,293 @@
+from datetime import datetime, timezone
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from config.config import Config
+from utils.database import get_collection
+from utils.logger import logger
+from utils.projection import projection
+from utils.indexes import INDEXES
+
+# One precomputed public page document per organization:
+# {"organization_id", "incidents": [entry], "maintenances": [entry], "updated_at"}
+public_pages_collection = get_collection("public_pages")
+
+# Snapshot array holding the entries of each actor type
+SECTIONS = {"incident": "incidents", "maintenance": "maintenances"}
+
+
+def _iso(value):
+    # Render datetimes as MongoDB returns them: naive UTC, millisecond precision
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.replace(microsecond=value.microsecond // 1000 * 1000).isoformat()
+    return value
+
+
+def activity_entry(activity: dict):
+    # Activity as it appears on the public page
+    return {
+        "activity_id": activity["activity_id"],
+        "organization_id": activity["organization_id"],
+        "action": activity["action"],
+        "activity_description": activity["activity_description"],
+        "actor_id": activity["actor_id"],
+        "actor_type": activity["actor_type"],
+        "timestamp": _iso(activity["timestamp"]),
+    }
+
+
+def _recent_activities(activities: list):
+    # Activities arrive oldest first; only the most recent ones are kept
+    return [
+        activity_entry(activity)
+        for activity in list(activities)[-Config.PUBLIC_PAGE_MAX_ACTIVITIES :]
+    ]
+
+
+def incident_entry(incident: dict, activities: list = ()):
+    # Convert an incident record into the public page format
+    return {
+        "incident_id": incident["incident_id"],
+        "organization_id": incident["organization_id"],
+        "incident_name": incident["incident_name"],
+        "incident_description": incident["incident_description"],
+        "incident_type": "Incident",
+        "activities": _recent_activities(activities),
+        "service_impacted": incident["service_impacted"],
+        "created_at": _iso(incident["created_at"]),
+    }
+
+
+def maintenance_entry(maintenance: dict, activities: list = ()):
+    # Convert a maintenance record into the public page format
+    return {
+        "incident_id": maintenance["maintenance_id"],
+        "organization_id": maintenance["organization_id"],
+        "incident_name": maintenance["maintenance_name"],
+        "incident_description": maintenance["maintenance_description"],
+        "incident_type": "Maintenance",
+        "activities": _recent_activities(activities),
+        "service_impacted": maintenance["service_impacted"],
+        "created_at": _iso(maintenance["start_from"]),
+    }
+
+
+async def start():
+    """Create the unique organization index the generation guard depends on.
+
+    Without it a save with a stale generation would insert a second snapshot
+    instead of failing, so it is created on startup whatever
+    MONGO_ENSURE_INDEXES says.
+    """
+    try:
+        await public_pages_collection.create_indexes(INDEXES["public_pages"])
+    except Exception as e:
+        logger.error(f"An error occurred in creating Public Page snapshot index: {str(e)}")
+
+
+async def get_snapshot(organization_id: str, fields: list = None):
+    """Fetch the organization's snapshot, or None if it is not built.
+
+    With ``fields``, only those fields of each entry leave the database.
+    """
+    if fields is None:
+        selected = {"_id": 0, "incidents": 1, "maintenances": 1}
+    else:
+        selected = {
+            **projection(fields, prefix="incidents."),
+            **projection(fields, prefix="maintenances."),
+        }
+    snapshot = await public_pages_collection.find_one(
+        {"organization_id": organization_id, "built": True}, selected
+    )
+    if snapshot is not None:
+        # An organization without records of one type has no entries to project
+        snapshot.setdefault("incidents", [])
+        snapshot.setdefault("maintenances", [])
+    return snapshot
+
+
+async def get_generation(organization_id: str):
+    """Read the generation a rebuild has to match when it saves."""
+    snapshot = await public_pages_collection.find_one(
+        {"organization_id": organization_id}, {"_id": 0, "generation": 1}
+    )
+    return snapshot.get("generation") if snapshot else None
+
+
+async def save_snapshot(
+    organization_id: str, generation, incidents: list, maintenances: list
+) -> bool:
+    """Store fully rebuilt entries unless a write advanced the generation.
+
+    Returns False when a write landed since ``generation`` was read; the
+    rebuilt entries may miss it, so they are not stored.
+    """
+    try:
+        result = await public_pages_collection.replace_one(
+            {"organization_id": organization_id, "generation": generation},
+            {
+                "organization_id": organization_id,
+                # A page first built without a document starts counting at 0,
+                # so later writes can $inc it
+                "generation": generation if generation is not None else 0,
+                "built": True,
+                "incidents": incidents,
+                "maintenances": maintenances,
+                "updated_at": datetime.now(timezone.utc),
+            },
+            upsert=True,
+        )
+        return result.matched_count > 0 or result.upserted_id is not None
+    except DuplicateKeyError:
+        # Another generation was stored in the meantime
+        return False
+
+
+async def drop_snapshot(organization_id: str, generation):
+    """Delete the snapshot of an organization left without records."""
+    await public_pages_collection.delete_one(
+        {"organization_id": organization_id, "generation": generation}
+    )
+
+
+async def discard_snapshot(organization_id: str):
+    """Mark the snapshot stale so the next read rebuilds it from the collections."""
+    await public_pages_collection.update_one(
+        {"organization_id": organization_id},
+        {"$set": {"built": False}, "$inc": {"generation": 1}},
+    )
+
+
+def _advance_generation(organization_id: str):
+    # Runs before every patch, so a rebuild that read the collections earlier
+    # can no longer save; creates the document if no snapshot was built yet
+    return UpdateOne(
+        {"organization_id": organization_id},
+        {"$inc": {"generation": 1}},
+        upsert=True,
+    )
+
+
+def _entry_update(
+    organization_id: str,
+    update: dict,
+    entry_id=None,
+    section=None,
+    match=None,
+    conditions=None,
+):
+    # With an entry_id the update targets that entry through the positional $;
+    # ``match`` adds conditions on that entry, ``conditions`` on the document
+    query = {"organization_id": organization_id, "built": True, **(conditions or {})}
+    if entry_id is not None:
+        query[section] = {"$elemMatch": {"incident_id": entry_id, **(match or {})}}
+    update.setdefault("$set", {})["updated_at"] = datetime.now(timezone.utc)
+    return UpdateOne(query, update)
+
+
+async def _apply(organization_id: str, operations: list):
+    # Snapshots are only patched once built; a missing one is built on first read.
+    # A failed patch marks the snapshot stale instead of leaving it out of date.
+    if not operations:
+        return
+    try:
+        await public_pages_collection.bulk_write(
+            [_advance_generation(organization_id), *operations]
+        )
+    except Exception as e:
+        logger.error(f"An error occurred in updating Public Page snapshot: {str(e)}")
+        try:
+            await discard_snapshot(organization_id)
+        except Exception as e:
+            logger.error(f"An error occurred in discarding Public Page snapshot: {str(e)}")
+
+
+async def add_entries(actor_type: str, entries: list, organization_id: str):
+    """Append new incident or maintenance entries in one round trip."""
+    section = SECTIONS[actor_type]
+    operations = []
+    for entry in entries:
+        operations.append(
+            _entry_update(
+                organization_id,
+                {"$push": {section: entry}},
+                # Skip entries a concurrent rebuild already read from the collection
+                conditions={f"{section}.incident_id": {"$ne": entry["incident_id"]}},
+            )
+        )
+    await _apply(organization_id, operations)
+
+
+async def add_entry(actor_type: str, entry: dict):
+    """Append a new incident or maintenance entry."""
+    await add_entries(actor_type, [entry], entry["organization_id"])
+
+
+async def update_entries(actor_type: str, entries: list, organization_id: str):
+    """Overwrite the entries' fields, keeping their activities."""
+    section = SECTIONS[actor_type]
+    await _apply(
+        organization_id,
+        [
+            _entry_update(
+                organization_id,
+                {
+                    "$set": {
+                        f"{section}.$.{field}": value
+                        for field, value in entry.items()
+                        if field != "activities"
+                    }
+                },
+                entry_id=entry["incident_id"],
+                section=section,
+            )
+            for entry in entries
+        ],
+    )
+
+
+async def update_entry(actor_type: str, entry: dict, organization_id: str):
+    """Overwrite an entry's fields, keeping its activities."""
+    await update_entries(actor_type, [entry], organization_id)
+
+
+async def remove_entry(actor_type: str, actor_id: str, organization_id: str):
+    """Remove an incident or maintenance entry."""
+    update = {"$pull": {SECTIONS[actor_type]: {"incident_id": actor_id}}}
+    await _apply(organization_id, [_entry_update(organization_id, update)])
+
+
+async def add_activities(activities: list):
+    """Append activities to the entries of the incidents or maintenances they belong to."""
+    operations = {}
+    for activity in activities:
+        section = SECTIONS.get(activity["actor_type"])
+        if section is None:
+            # Service activities are not shown on the public page
+            continue
+        operations.setdefault(activity["organization_id"], []).append(
+            _entry_update(
+                activity["organization_id"],
+                {
+                    "$push": {
+                        f"{section}.$.activities": {
+                            "$each": [activity_entry(activity)],
+                            "$slice": -Config.PUBLIC_PAGE_MAX_ACTIVITIES,
+                        }
+                    }
+                },
+                entry_id=activity["actor_id"],
+                section=section,
+                # Skip activities a concurrent rebuild already read
+                match={"activities.activity_id": {"$ne": activity["activity_id"]}},
+            )
+        )
+    for organization_id, organization_operations in operations.items():
+        await _apply(organization_id, organization_operations)
+
+
+async def add_activity(activity: dict):
+    """Append an activity to the entry of the incident or maintenance it belongs to."""
+    await add_activities([activity])
@@ -1,15 +1,28 @@
 from pydantic import BaseModel, Field
 from datetime import datetime, timezone
-from typing import Optional
-from utils.database import connect_to_mongodb
-from models.activity import create_activity, ActivityModel
+from typing import Dict, Optional
+from pymongo import InsertOne, ReturnDocument
+from utils.database import get_collection
+from models.activity import create_activity, create_activities, ActivityModel
+from app.sockets.sockets import manager
+from app.sockets.events import (
+    SERVICE_CREATED,
+    SERVICE_UPDATED,
+    SERVICE_DELETED,
+)
 from utils.logger import logger
+from config.config import Config
+from utils.pagination import fetch_page
+from utils.projection import projection
+from utils.bulk import bulk_write, update_each
+from utils.documents import to_document
+from utils.cache import public_page_cache
 import uuid
 
 
 # Define the schema for the Service model using Pydantic
 class ServiceSchema(BaseModel):
-    service_id: str = Field(..., unique=True)  # Unique service ID
+    service_id: str = Field(...)  # Unique per organization (index)
     organization_id: str  # ID of the organization
     service_name: str = Field(..., min_length=5, max_length=255)  # Name of the service
     service_description: str = Field(
@@ -23,19 +36,30 @@ class ServiceSchema(BaseModel):
     )  # Start date, default is current time
 
 
-# Connect to MongoDB and get the services collection
-db = connect_to_mongodb().Plivo
-services_collection = db.services
+# Named field selections for list views; "full" returns every field
+SERVICE_VIEWS = {"summary": ["service_id", "service_name", "service_status"]}
+
+
+# Get the services collection from the shared database client
+services_collection = get_collection("services")
 
 
 # Function to create a new service
 async def create_service(service: ServiceSchema):
     try:
         # Insert the service into the collection
-        created_service = services_collection.insert_one(
-            ServiceSchema(**service.model_dump()).model_dump()
+        created_service = await services_collection.insert_one(
+            to_document(service)
         )
         if created_service:
+            # Invalidate cached views of the organization
+            public_page_cache.bump(service.organization_id)
+            # Notify connected viewers of the new service
+            await manager.broadcast_event(
+                SERVICE_CREATED,
+                service.organization_id,
+                entity=service.model_dump(mode="json"),
+            )
             return {"success": True, "message": "Service created successfully"}
         logger.error("Service creation failed")
         return {"success": False, "message": "Service creation failed"}
@@ -45,25 +69,34 @@ async def create_service(service: ServiceSchema):
 
 
 # Function to get all services for a specific organization
-async def get_all_services(organization_id: str):
+async def get_all_services(
+    organization_id: str, limit: int = None, after=None, fields: list = None
+):
     try:
-        # Find all services for the given organization ID
-        services = services_collection.find(
-            {"organization_id": organization_id},
-            {
-                "_id": 0,
-            },
-        )
-        if services:
-            # Convert start_date to ISO format
-            services = [
-                {**service, "start_date": service["start_date"].isoformat()}
-                for service in list(services)
-            ]
+        next_cursor = None
+        if limit is None and after is None:
+            # Find all services for the given organization ID
+            services = await services_collection.find(
+                {"organization_id": organization_id},
+                projection(fields),
+            ).to_list(length=None)
+        else:
+            # Fetch a single page in _id order
+            services, next_cursor = await fetch_page(
+                services_collection,
+                {"organization_id": organization_id},
+                limit=limit,
+                after=after,
+                fields=fields,
+            )
+        # An empty result is still a successful fetch
+        if services is not None:
+            # Datetimes are left as is, the response class encodes them
             return {
                 "success": True,
                 "message": "Services fetched successfully",
                 "data": services,
+                "next_cursor": next_cursor,
             }
         logger.error("Services fetch failed")
         return {"success": False, "message": "Services fetch failed"}
@@ -72,19 +105,29 @@ async def get_all_services(organization_id: str):
         return {"success": False, "message": f"An error occurred: {str(e)}"}
 
 
+# Function to stream all services for a specific organization
+async def iter_all_services(organization_id: str, fields: list = None):
+    # Motor fetches the cursor in batches, so memory stays flat for any size
+    cursor = services_collection.find(
+        {"organization_id": organization_id},
+        projection(fields),
+        batch_size=Config.STREAM_BATCH_SIZE,
+    )
+    async for service in cursor:
+        yield service
+
+
 # Function to get a service by its ID
 async def get_service_by_id(service_id: str, organization_id: str):
     try:
         # Find the service with the given service ID
-        service = services_collection.find_one(
+        service = await services_collection.find_one(
             {"service_id": service_id, "organization_id": organization_id},
             {
                 "_id": 0,
             },
         )
-        # Change the date format to ISO format
         if service:
-            service["start_date"] = service["start_date"].isoformat()
             return {
                 "success": True,
                 "message": "Service fetched successfully",
@@ -106,14 +149,22 @@ async def update_service(service: ServiceSchema, organization_id: str):
         #     {"$set": ServiceSchema(**service.dict()).dict()},
         # )
 
-        current_service = await get_service_by_id(
-            service_id=service.service_id, organization_id=organization_id
+        # Apply the update and read the previous status in one atomic round trip,
+        # so only one of several concurrent updates sees the status change
+        previous_service = await services_collection.find_one_and_update(
+            {"service_id": service.service_id, "organization_id": organization_id},
+            {"$set": to_document(service)},
+            projection={"_id": 0, "service_status": 1},
+            return_document=ReturnDocument.BEFORE,
         )
-        if not current_service:
+        if previous_service is None:
             return {"success": False, "message": "Service not found"}
 
+        # Invalidate cached views of the organization
+        public_page_cache.bump(organization_id)
+
         ## Check if the status is being updated from previous status
-        if current_service["data"]["service_status"] != service.service_status:
+        if previous_service["service_status"] != service.service_status:
             activity = await create_activity(
                 activity=ActivityModel(
                     activity_id=str(uuid.uuid4()),
@@ -122,23 +173,127 @@ async def update_service(service: ServiceSchema, organization_id: str):
                     actor_type="service",
                     organization_id=organization_id,
                     activity_description=f"Service {service.service_name} updated with status {service.service_status}",
-                )
+                ),
+                event_type=SERVICE_UPDATED,
+                entity=service.model_dump(mode="json"),
             )
             if not activity["success"]:
                 logger.error("Activity creation failed")
                 return {"success": False, "message": "Activity creation failed"}
+        else:
+            # No activity was logged, so send the change event here
+            await manager.broadcast_event(
+                SERVICE_UPDATED,
+                organization_id,
+                entity=service.model_dump(mode="json"),
+            )
+        return {"success": True, "message": "Service updated successfully"}
+    except Exception as e:
+        logger.error(f"An error occurred in updating Service: {str(e)}")
+        return {"success": False, "message": f"An error occurred: {str(e)}"}
 
-        updated_service = services_collection.update_one(
-            {"service_id": service.service_id, "organization_id": organization_id},
-            {"$set": ServiceSchema(**service.dict()).dict()},
+
+# Function to create many services with one bulk write, keyed by batch index;
+# returns the error of every item that was not created
+async def create_services(services: Dict[int, ServiceSchema], organization_id: str):
+    try:
+        errors = await bulk_write(
+            services_collection,
+            {
+                index: InsertOne(to_document(service))
+                for index, service in services.items()
+            },
         )
+        created = {
+            index: service for index, service in services.items() if index not in errors
+        }
+        if created:
+            # Invalidate cached views of the organization
+            public_page_cache.bump(organization_id)
+        # Queued together, so the coalescer sends them as one message
+        for service in created.values():
+            await manager.broadcast_event(
+                SERVICE_CREATED,
+                organization_id,
+                entity=service.model_dump(mode="json"),
+            )
+        return {"success": True, "message": "Services processed", "data": errors}
+    except Exception as e:
+        logger.error(f"An error occurred in creating Services: {str(e)}")
+        return {"success": False, "message": f"An error occurred: {str(e)}"}
+
+
+# Function to update many services, each atomically, and log their status
+# changes in one insert, keyed by batch index; returns the error of every item
+# that was not updated
+async def update_services(services: Dict[int, ServiceSchema], organization_id: str):
+    try:
+        # Apply each update atomically and read the status it replaced, so only
+        # one of several concurrent batches sees a given status change
+        documents = {
+            index: to_document(service) for index, service in services.items()
+        }
+        previous, errors = await update_each(
+            services_collection,
+            {
+                index: (
+                    {
+                        "service_id": service.service_id,
+                        "organization_id": organization_id,
+                    },
+                    {"$set": documents[index]},
+                )
+                for index, service in services.items()
+            },
+            {"_id": 0, "service_status": 1},
+        )
+        for index in services:
+            if index not in previous and index not in errors:
+                errors[index] = "Service not found"
+        updated = {index: services[index] for index in previous}
+        if updated:
+            # Invalidate cached views of the organization
+            public_page_cache.bump(organization_id)
 
-        if updated_service:
-            return {"success": True, "message": "Service updated successfully"}
-        logger.error("Service update failed")
-        return {"success": False, "message": "Service update failed"}
+        # Log the status changes in a single insert
+        status_changed = {
+            index: service
+            for index, service in updated.items()
+            if previous[index]["service_status"] != service.service_status
+        }
+        activities = await create_activities(
+            {
+                index: ActivityModel(
+                    activity_id=str(uuid.uuid4()),
+                    action=service.service_status,
+                    actor_id=service.service_id,
+                    actor_type="service",
+                    organization_id=organization_id,
+                    activity_description=f"Service {service.service_name} updated with status {service.service_status}",
+                )
+                for index, service in status_changed.items()
+            },
+            event_type=SERVICE_UPDATED,
+            entities={
+                index: service.model_dump(mode="json")
+                for index, service in status_changed.items()
+            },
+        )
+        if not activities["success"]:
+            return activities
+        for index in activities["data"]:
+            errors[index] = "Activity creation failed"
+        for index, service in updated.items():
+            if index not in status_changed:
+                # No activity was logged, so send the change event here
+                await manager.broadcast_event(
+                    SERVICE_UPDATED,
+                    organization_id,
+                    entity=service.model_dump(mode="json"),
+                )
+        return {"success": True, "message": "Services processed", "data": errors}
     except Exception as e:
-        logger.error(f"An error occurred in updating Service: {str(e)}")
+        logger.error(f"An error occurred in updating Services: {str(e)}")
         return {"success": False, "message": f"An error occurred: {str(e)}"}
 
 
@@ -146,10 +301,15 @@ async def update_service(service: ServiceSchema, organization_id: str):
 async def delete_service(service_id: str, organization_id: str):
     try:
         # Delete the service with the given service ID and organization ID
-        deleted_service = services_collection.delete_one(
+        deleted_service = await services_collection.delete_one(
             {"service_id": service_id, "organization_id": organization_id}
         )
         if deleted_service:
+            # Invalidate cached views of the organization
+            public_page_cache.bump(organization_id)
+            await manager.broadcast_event(
+                SERVICE_DELETED, organization_id, entity={"service_id": service_id}
+            )
             return {"success": True, "message": "Service deleted successfully"}
         logger.error("Service deletion failed")
         return {"success": False, "message": "Service deletion failed"}
@@ -1,4 +1,13 @@
 import uvicorn
+from config.config import Config
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    # Protocol-level pings close half-open WebSocket connections
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8000,
+        reload=True,
+        ws_ping_interval=Config.WS_PING_INTERVAL_SECONDS,
+        ws_ping_timeout=Config.WS_PING_TIMEOUT_SECONDS,
+    )
@@ -0,0 +1,125 @@
+import asyncio
+from typing import Any, Dict, List
+from pydantic import BaseModel, ValidationError
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+from config.config import Config
+
+
+def item_result(index: int, item_id, error: str = None) -> dict:
+    """Outcome of one item of a batch request."""
+    return {
+        "index": index,
+        "id": item_id,
+        "success": error is None,
+        "message": error or "OK",
+    }
+
+
+def validate_items(model: type[BaseModel], items: List[Any], organization_id: str):
+    """Validate every item of a batch before anything is written.
+
+    Returns the valid models by their index in the batch, and the error
+    message of each rejected item by index.
+    """
+    valid, errors = {}, {}
+    for index, item in enumerate(items):
+        try:
+            valid_item = model.model_validate(item)
+        except ValidationError as e:
+            # Errors about the item itself, e.g. not an object, have no location
+            errors[index] = "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+                if error["loc"]
+                else error["msg"]
+                for error in e.errors()
+            )
+            continue
+        # Items can only be written for the organization the caller is signed in to
+        if valid_item.organization_id != organization_id:
+            errors[index] = "Organization ID does not match"
+            continue
+        valid[index] = valid_item
+    return valid, errors
+
+
+async def bulk_write(collection, operations: Dict[int, object]) -> Dict[int, str]:
+    """Run every operation in one unordered bulk_write.
+
+    ``operations`` maps batch indexes to write operations. Returns the error
+    message of each failed operation by batch index; the others were applied.
+    """
+    if not operations:
+        return {}
+    indexes = list(operations)
+    try:
+        await collection.bulk_write(list(operations.values()), ordered=False)
+        return {}
+    except BulkWriteError as e:
+        return {
+            indexes[error["index"]]: error.get("errmsg", "Write failed")
+            for error in e.details.get("writeErrors", [])
+        }
+
+
+async def update_each(collection, updates: Dict[int, tuple], projection: dict):
+    """Apply every ``(filter, update)`` with its own atomic find_one_and_update.
+
+    At most ``BULK_UPDATE_CONCURRENCY`` updates are in flight at once, leaving
+    the rest of the connection pool to other requests. Each returns the
+    document as it was before the update, so a status transition is seen by
+    exactly one of several concurrent writers. Returns the previous document
+    of every matched item by index, and the error message of each failed item
+    by index; items that matched nothing appear in neither.
+    """
+    semaphore = asyncio.Semaphore(max(Config.BULK_UPDATE_CONCURRENCY, 1))
+
+    async def update(query, change):
+        async with semaphore:
+            return await collection.find_one_and_update(
+                query,
+                change,
+                projection=projection,
+                return_document=ReturnDocument.BEFORE,
+            )
+
+    results = await asyncio.gather(
+        *(update(query, change) for query, change in updates.values()),
+        return_exceptions=True,
+    )
+    previous, errors = {}, {}
+    for index, result in zip(updates, results):
+        if isinstance(result, Exception):
+            errors[index] = str(result)
+        elif result is not None:
+            previous[index] = result
+    return previous, errors
+
+
+async def process_batch(
+    items: List[Any], model: type[BaseModel], organization_id: str, id_field: str, write
+):
+    """Validate a batch, hand the valid items to ``write`` and report every item.
+
+    ``write(valid_items, organization_id)`` returns the usual result dict with
+    the error message of each failed item by index in ``data``.
+    """
+    valid, errors = validate_items(model, items, organization_id)
+    if valid:
+        written = await write(valid, organization_id)
+        if not written["success"]:
+            return written
+        errors.update(written["data"])
+    results = [
+        item_result(
+            index,
+            item.get(id_field) if isinstance(item, dict) else None,
+            errors.get(index),
+        )
+        for index, item in enumerate(items)
+    ]
+    return {
+        "success": True,
+        "message": f"{len(items) - len(errors)} of {len(items)} items succeeded",
+        "data": results,
+    }
@@ -0,0 +1,141 @@
+import asyncio
+import time
+from collections import OrderedDict
+from config.config import Config
+
+# Sentinel distinguishing a cache miss from a cached ``None``
+MISSING = object()
+
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries expire after a time-to-live."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=MISSING):
+        """Return the cached value for ``key`` or ``default`` if absent or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            # Drop the expired entry
+            del self._entries[key]
+            self.misses += 1
+            return default
+        # Mark the entry as most recently used
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl: float = None):
+        """Store ``value`` under ``key``, evicting the least recently used entries."""
+        ttl = self.ttl if ttl is None else ttl
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class VersionedCache:
+    """Per-organization cache invalidated by bumping the organization's version.
+
+    Writers call ``bump`` after changing an organization's data; any entry
+    computed against an older version is treated as a miss from then on.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._versions = {}
+        self._loading = {}
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, organization_id: str) -> int:
+        return self._versions.get(organization_id, 0)
+
+    def bump(self, organization_id: str) -> int:
+        """Invalidate every cached entry for the organization."""
+        version = self.version(organization_id) + 1
+        self._versions[organization_id] = version
+        return version
+
+    def get(self, organization_id: str, key: str = ""):
+        entry = self._entries.get((organization_id, key))
+        if entry is MISSING:
+            self.misses += 1
+            return MISSING
+        version, value = entry
+        if version != self.version(organization_id):
+            # Entry was computed before the last write, discard it
+            self._entries.delete((organization_id, key))
+            self.misses += 1
+            return MISSING
+        self.hits += 1
+        return value
+
+    def set(self, organization_id: str, value, key: str = "", version: int = None):
+        """Cache ``value``; pass the ``version`` read before computing it to avoid races."""
+        version = self.version(organization_id) if version is None else version
+        self._entries.set((organization_id, key), (version, value))
+
+    async def get_or_load(self, organization_id: str, loader, key: str = "", cacheable=None):
+        """Return the cached value or await ``loader()`` once for all concurrent callers."""
+        value = self.get(organization_id, key)
+        if value is not MISSING:
+            return value
+
+        version = self.version(organization_id)
+        loading_key = (organization_id, key, version)
+        task = self._loading.get(loading_key)
+        if task is None:
+            task = asyncio.ensure_future(loader())
+            self._loading[loading_key] = task
+            task.add_done_callback(lambda _: self._loading.pop(loading_key, None))
+            value = await asyncio.shield(task)
+            if cacheable is None or cacheable(value):
+                self.set(organization_id, value, key=key, version=version)
+            return value
+        return await asyncio.shield(task)
+
+    def stats(self):
+        return {
+            **self._entries.stats(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "organizations": len(self._versions),
+        }
+
+
+# Cache for the assembled public status page of each organization
+public_page_cache = VersionedCache(
+    maxsize=Config.PUBLIC_PAGE_CACHE_MAX_ENTRIES,
+    ttl=Config.PUBLIC_PAGE_CACHE_TTL_SECONDS,
+)
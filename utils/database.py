@@ -1,19 +1,365 @@
+import asyncio
+import threading
+import time
+import orjson
 import pymongo
+from pymongo import monitoring
+from motor.motor_asyncio import AsyncIOMotorClient
 from config.config import Config
-from bson.json_util import dumps
+from utils.logger import logger
+from utils.metrics import registry, current_request
+
+# Process-wide MongoDB client, created once at application startup
+_client = None
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Keeps running connection pool counters for every server the client talks to."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._servers = {}
+
+    def _server(self, address):
+        key = "{}:{}".format(*address)
+        if key not in self._servers:
+            self._servers[key] = {
+                "open": 0,
+                "checked_out": 0,
+                "created_total": 0,
+                "closed_total": 0,
+                "check_out_failures": 0,
+                "pool_cleared": 0,
+            }
+        return self._servers[key]
+
+    def _bump(self, address, **deltas):
+        with self._lock:
+            server = self._server(address)
+            for name, delta in deltas.items():
+                server[name] += delta
+
+    def pool_created(self, event):
+        self._bump(event.address)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._bump(event.address, pool_cleared=1)
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._bump(event.address, open=1, created_total=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._bump(event.address, open=-1, closed_total=1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._bump(event.address, check_out_failures=1)
+
+    def connection_checked_out(self, event):
+        self._bump(event.address, checked_out=1)
+
+    def connection_checked_in(self, event):
+        self._bump(event.address, checked_out=-1)
+
+    def snapshot(self):
+        with self._lock:
+            return {address: dict(stats) for address, stats in self._servers.items()}
+
+
+pool_stats_listener = PoolStatsListener()
+
+# Commands timed by the command listener, and the collection each one names
+MONITORED_COMMANDS = {
+    "find",
+    "getMore",
+    "aggregate",
+    "count",
+    "distinct",
+    "insert",
+    "update",
+    "delete",
+    "findAndModify",
+}
+# Collections read through tailable or change stream cursors: their getMore
+# waits on the server for new data, so its duration says nothing about the query
+AWAITED_COLLECTIONS = {Config.BROADCAST_EVENTS_COLLECTION}
+# Session and transport fields that cannot be sent again inside an explain
+_EXPLAIN_SKIPPED_FIELDS = {"lsid", "txnNumber", "readConcern", "writeConcern"}
+
+mongodb_commands = registry.counter(
+    "mongodb_commands_total",
+    "MongoDB commands by collection, command and outcome.",
+    ("collection", "command", "status"),
+)
+mongodb_command_duration = registry.histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB command round-trip time reported by the driver.",
+    ("collection", "command"),
+)
+mongodb_slow_commands = registry.counter(
+    "mongodb_slow_commands_total",
+    "MongoDB commands slower than MONGO_SLOW_QUERY_MS.",
+    ("collection", "command"),
+)
+
+
+def command_filter(command_name: str, command: dict):
+    """The query filter a command selects documents with, if it has one."""
+    if command_name == "find":
+        return command.get("filter")
+    if command_name in ("count", "distinct", "findAndModify"):
+        return command.get("query")
+    if command_name == "aggregate":
+        pipeline = command.get("pipeline") or [{}]
+        return pipeline[0].get("$match")
+    if command_name in ("update", "delete"):
+        statements = command.get(f"{command_name}s") or [{}]
+        return statements[0].get("q")
+    return None
+
+
+def filter_shape(value):
+    """Replace the values of a filter with "?", keeping its fields and operators."""
+    if isinstance(value, dict):
+        return {key: filter_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        # $and/$or keep each clause, $in/$nin collapse to one placeholder
+        clauses = [filter_shape(item) for item in value if isinstance(item, dict)]
+        return clauses or ["?"]
+    return "?"
+
+
+def plan_summary(explain: dict) -> str:
+    """Summarize the winning plan of an explain(), e.g. ``FETCH > IXSCAN(a_1)``."""
+    planner = explain.get("queryPlanner")
+    if planner is None:
+        # Aggregations nest the planner of their first stage
+        stages = explain.get("stages") or [{}]
+        planner = stages[0].get("$cursor", {}).get("queryPlanner", {})
+    plan = planner.get("winningPlan", {})
+    plan = plan.get("queryPlan", plan)
+    stages = []
+    while plan:
+        stage = plan.get("stage", "?")
+        if plan.get("indexName"):
+            stage += f"({plan['indexName']})"
+        stages.append(stage)
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return " > ".join(stages) or "unknown"
+
+
+class CommandStatsListener(monitoring.CommandListener):
+    """Times every model command per collection and logs the slow ones.
+
+    Driver callbacks run on Motor's executor threads with the calling task's
+    context, so the request that issued a command is known here too.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = {}
+        self._explained = {}
+        # Event loop explains are scheduled on, set when the client is created
+        self.loop: asyncio.AbstractEventLoop = None
+
+    def started(self, event):
+        if event.command_name not in MONITORED_COMMANDS:
+            return
+        command = event.command
+        if event.command_name == "getMore":
+            collection = command.get("collection")
+            # Change streams and tailable cursors block for their await time;
+            # maxTimeMS is only accepted on the getMore of awaitData cursors
+            if "maxTimeMS" in command or collection in AWAITED_COLLECTIONS:
+                return
+        else:
+            collection = command.get(event.command_name)
+        with self._lock:
+            self._started[(event.connection_id, event.request_id)] = (
+                collection,
+                command,
+                current_request.get(),
+            )
+
+    def _finished(self, event, status):
+        with self._lock:
+            started = self._started.pop((event.connection_id, event.request_id), None)
+        if started is None:
+            return
+        collection, command, request = started
+        labels = (str(collection), event.command_name)
+        seconds = event.duration_micros / 1e6
+        mongodb_commands.inc((*labels, status))
+        mongodb_command_duration.observe(labels, seconds)
+        if Config.MONGO_SLOW_QUERY_MS and seconds * 1000 >= Config.MONGO_SLOW_QUERY_MS:
+            mongodb_slow_commands.inc(labels)
+            self._log_slow(event, collection, command, request, seconds)
+
+    def succeeded(self, event):
+        self._finished(event, "ok")
+
+    def failed(self, event):
+        self._finished(event, "failed")
+
+    def _log_slow(self, event, collection, command, request, seconds):
+        query = command_filter(event.command_name, command)
+        shape = orjson.dumps(filter_shape(query)).decode() if query else "-"
+        logger.warning(
+            f"Slow MongoDB {event.command_name} on {collection}: "
+            f"{seconds * 1000:.1f}ms filter={shape} from {request or 'background task'}"
+        )
+        if Config.MONGO_SLOW_QUERY_EXPLAIN and query is not None:
+            self._schedule_explain(event, collection, command, shape)
+
+    def _schedule_explain(self, event, collection, command, shape):
+        # Explain each query shape at most once per interval
+        key = (collection, event.command_name, shape)
+        now = time.monotonic()
+        with self._lock:
+            last = self._explained.get(key)
+            interval = Config.MONGO_SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS
+            if last is not None and now - last < interval:
+                return
+            self._explained[key] = now
+        if self.loop is None or self.loop.is_closed():
+            return
+        explained = {
+            field: value
+            for field, value in command.items()
+            if not field.startswith("$") and field not in _EXPLAIN_SKIPPED_FIELDS
+        }
+        if event.command_name in ("update", "delete"):
+            # explain accepts a single statement
+            statements = f"{event.command_name}s"
+            explained[statements] = explained[statements][:1]
+        asyncio.run_coroutine_threadsafe(
+            self._explain(
+                event.database_name, event.command_name, collection, explained, shape
+            ),
+            self.loop,
+        )
+
+    async def _explain(self, database_name, command_name, collection, command, shape):
+        try:
+            explain = await _client[database_name].command(
+                {"explain": command, "verbosity": "queryPlanner"}
+            )
+            logger.warning(
+                f"Slow MongoDB {command_name} on {collection} filter={shape} "
+                f"plan: {plan_summary(explain)}"
+            )
+        except Exception as e:
+            logger.error(f"An error occurred in explaining slow query: {str(e)}")
+
+
+command_stats_listener = CommandStatsListener()
+
+
+def _client_options():
+    """Build MongoClient keyword arguments from the application config."""
+    options = {
+        "maxPoolSize": Config.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": Config.MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": Config.MONGO_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": Config.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "connectTimeoutMS": Config.MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": Config.MONGO_SOCKET_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": Config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "event_listeners": [pool_stats_listener, command_stats_listener],
+    }
+    if Config.MONGO_COMPRESSORS:
+        options["compressors"] = Config.MONGO_COMPRESSORS
+    if Config.MONGO_READ_CONCERN:
+        options["readConcernLevel"] = Config.MONGO_READ_CONCERN
+    if Config.MONGO_WRITE_CONCERN:
+        write_concern = Config.MONGO_WRITE_CONCERN
+        options["w"] = int(write_concern) if write_concern.isdigit() else write_concern
+    if Config.MONGO_READ_PREFERENCE:
+        options["readPreference"] = Config.MONGO_READ_PREFERENCE
+    return options
+
+
+def _create_client():
+    return AsyncIOMotorClient(Config.DATABASE_URL, **_client_options())
 
 
 def connect_to_mongodb():
-    """Connects to MongoDB using the given MongoDB URI."""
+    """Return the shared MongoDB client, creating it on first use.
+
+    The client is asyncio-native (Motor), so every query awaited from the
+    ``models`` coroutines yields to the event loop instead of blocking it.
+    """
+    global _client
+    if _client is not None:
+        return _client
     try:
-        connection = pymongo.MongoClient(Config.DATABASE_URL)
-        print("Connected to MongoDB")
+        _client = _create_client()
+        try:
+            # Slow-query explains run on the loop that owns the client
+            command_stats_listener.loop = asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        logger.info("Connected to MongoDB")
 
-        return connection
+        return _client
     except pymongo.errors.ConnectionFailure as e:
-        print("Failed to connect to MongoDB: {}".format(e))
+        logger.error(f"Failed to connect to MongoDB: {str(e)}")
         return None
 
 
+def close_mongodb_connection():
+    """Close the shared MongoDB client and release its connection pool."""
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+        logger.info("Closed MongoDB connection")
+
+
+def get_database():
+    """Return the application database on the shared client."""
+    return connect_to_mongodb()[Config.DATABASE_NAME]
+
+
+class LazyCollection:
+    """Module-level collection handle that resolves against the shared client on use.
+
+    Models bind these at import time, before the startup hook has created the
+    client, so the lookup is deferred until a query is actually issued.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(get_database()[self.name], attr)
+
+
+def get_collection(name: str):
+    """Return a lazily-resolved handle to a collection in the application database."""
+    return LazyCollection(name)
+
+
+def get_pool_stats():
+    """Return the configured pool limits and live per-server connection counters."""
+    return {
+        "connected": _client is not None,
+        "max_pool_size": Config.MONGO_MAX_POOL_SIZE,
+        "min_pool_size": Config.MONGO_MIN_POOL_SIZE,
+        "servers": pool_stats_listener.snapshot(),
+    }
+
+
 if __name__ == "__main__":
     connection = connect_to_mongodb()
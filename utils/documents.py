@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+
+
+def to_document(model: BaseModel) -> dict:
+    """Convert an already validated model into the document stored in MongoDB.
+
+    Request bodies were validated by FastAPI, so they are not validated again.
+    Each model class keeps the serializer pydantic compiled for it, and this
+    calls that serializer directly.
+    """
+    return type(model).__pydantic_serializer__.to_python(model)
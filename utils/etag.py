@@ -0,0 +1,95 @@
+import hashlib
+from typing import NamedTuple
+from fastapi.requests import Request
+from fastapi.responses import ORJSONResponse, Response
+from utils.cache import public_page_cache
+
+
+class EncodedBody(NamedTuple):
+    """A JSON response body encoded once, with its ETag."""
+
+    etag: str
+    body: bytes
+
+
+def body_etag(body: bytes) -> str:
+    """Strong ETag derived from the encoded response body.
+
+    Every worker derives the same tag for the same content, and each
+    representation (fields, view, page) gets its own tag.
+    """
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the client's If-None-Match already names ``etag``."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so ignore a W/ prefix
+    return etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+def response_key(name: str, fields=None, limit=None, cursor=None) -> str:
+    """Cache key of one representation of a listing: field selection and page."""
+    return f"{name}:{','.join(fields) if fields is not None else ''}:{limit}:{cursor}"
+
+
+def cache_headers(etag: str, cache_control: str) -> dict:
+    return {"ETag": etag, "Cache-Control": cache_control}
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    """Empty 304 response for a client that already holds the representation."""
+    return Response(status_code=304, headers=cache_headers(etag, cache_control))
+
+
+def encode_body(content) -> EncodedBody:
+    """Encode ``content`` as the JSON body of a response and tag it."""
+    body = ORJSONResponse(content).body
+    return EncodedBody(body_etag(body), body)
+
+
+def encoded_response(
+    request: Request, encoded: EncodedBody, cache_control: str
+) -> Response:
+    """Send an encoded body, or an empty 304 if the client already holds it."""
+    if etag_matches(request, encoded.etag):
+        return not_modified(encoded.etag, cache_control)
+    return Response(
+        encoded.body,
+        media_type="application/json",
+        headers=cache_headers(encoded.etag, cache_control),
+    )
+
+
+async def cached_etag_response(
+    request: Request, organization_id: str, key: str, build, cache_control: str
+) -> Response:
+    """Serve what ``build()`` returns, encoded once per version of the organization.
+
+    The encoded body and its ETag are kept in the public page cache under the
+    organization's current version and ``key``, so polling unchanged data is
+    a dict lookup: no query and no serializing, whether the answer is a 304 or
+    the stored body. Any write to the organization bumps the version.
+    ``build()`` returns the content, or a Response (e.g. an error) that is
+    sent as is and not cached.
+    """
+
+    async def load():
+        content = await build()
+        if isinstance(content, Response):
+            return content
+        return encode_body(content)
+
+    encoded = await public_page_cache.get_or_load(
+        organization_id,
+        load,
+        key=key,
+        cacheable=lambda value: isinstance(value, EncodedBody),
+    )
+    if isinstance(encoded, Response):
+        return encoded
+    return encoded_response(request, encoded, cache_control)
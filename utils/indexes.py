@@ -0,0 +1,140 @@
+import pymongo
+from pymongo import IndexModel
+from utils.database import get_database
+from utils.logger import logger
+
+# Indexes backing every tenant-scoped query shape, keyed by collection name
+INDEXES = {
+    "incidents": [
+        IndexModel(
+            [("organization_id", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)],
+            name="organization_id_order",
+        ),
+        IndexModel(
+            [("organization_id", pymongo.ASCENDING), ("incident_id", pymongo.ASCENDING)],
+            name="organization_incident_unique",
+            unique=True,
+        ),
+    ],
+    "maintenances": [
+        IndexModel(
+            [("organization_id", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)],
+            name="organization_id_order",
+        ),
+        IndexModel(
+            [
+                ("organization_id", pymongo.ASCENDING),
+                ("maintenance_id", pymongo.ASCENDING),
+            ],
+            name="organization_maintenance_unique",
+            unique=True,
+        ),
+    ],
+    "services": [
+        IndexModel(
+            [("organization_id", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)],
+            name="organization_id_order",
+        ),
+        IndexModel(
+            [("organization_id", pymongo.ASCENDING), ("service_id", pymongo.ASCENDING)],
+            name="organization_service_unique",
+            unique=True,
+        ),
+    ],
+    "activities": [
+        IndexModel(
+            [("organization_id", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)],
+            name="organization_id_order",
+        ),
+        IndexModel(
+            [
+                ("organization_id", pymongo.ASCENDING),
+                ("actor_id", pymongo.ASCENDING),
+                ("timestamp", pymongo.ASCENDING),
+            ],
+            name="organization_actor_timestamp",
+        ),
+        IndexModel(
+            [
+                ("organization_id", pymongo.ASCENDING),
+                ("activity_id", pymongo.ASCENDING),
+            ],
+            name="organization_activity_unique",
+            unique=True,
+        ),
+    ],
+    "public_pages": [
+        IndexModel(
+            [("organization_id", pymongo.ASCENDING)],
+            name="organization_unique",
+            unique=True,
+        ),
+    ],
+}
+
+
+async def ensure_indexes():
+    """Create any declared index that does not exist yet.
+
+    Each index is created on its own, so one failure (for example a unique
+    index over existing duplicates) does not block the others. The failure
+    shows up as missing in the report.
+    """
+    db = get_database()
+    for collection_name, indexes in INDEXES.items():
+        for index in indexes:
+            try:
+                await db[collection_name].create_indexes([index])
+            except pymongo.errors.PyMongoError as e:
+                logger.error(
+                    f"Failed to create index {index.document['name']} "
+                    f"on {collection_name}: {str(e)}"
+                )
+    return await get_index_report()
+
+
+async def get_index_report():
+    """Compare declared indexes with the database and report missing and unused ones."""
+    db = get_database()
+    report = {}
+    for collection_name, indexes in INDEXES.items():
+        declared = [index.document["name"] for index in indexes]
+        existing = await db[collection_name].index_information()
+
+        # Usage counters since the last server restart, when the server supports them
+        usage = {}
+        try:
+            async for stats in db[collection_name].aggregate([{"$indexStats": {}}]):
+                usage[stats["name"]] = stats["accesses"]["ops"]
+        except Exception as e:
+            logger.info(f"Index usage unavailable for {collection_name}: {str(e)}")
+
+        report[collection_name] = {
+            "missing": [name for name in declared if name not in existing],
+            "undeclared": [
+                name for name in existing if name != "_id_" and name not in declared
+            ],
+            "unused": [name for name, ops in usage.items() if ops == 0],
+        }
+    return report
+
+
+async def provision_indexes():
+    """Startup step: ensure indexes exist and log anything that needs attention."""
+    try:
+        report = await ensure_indexes()
+    except Exception as e:
+        logger.error(f"An error occurred in provisioning indexes: {str(e)}")
+        return None
+
+    for collection_name, entry in report.items():
+        if entry["missing"]:
+            logger.error(f"Missing indexes on {collection_name}: {entry['missing']}")
+        if entry["undeclared"]:
+            logger.info(
+                f"Undeclared indexes on {collection_name}: {entry['undeclared']}"
+            )
+        if entry["unused"]:
+            logger.info(f"Unused indexes on {collection_name}: {entry['unused']}")
+    logger.info("Indexes provisioned")
+    return report
@@ -0,0 +1,68 @@
+import base64
+import binascii
+import pymongo
+from bson import json_util, ObjectId
+from config.config import Config
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(document: dict) -> str:
+    """Encode the keyset position of ``document`` as an opaque URL-safe cursor."""
+    payload = json_util.dumps({"id": document["_id"]})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Decode a cursor into the ``_id`` of the last document of the previous page."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json_util.loads(base64.urlsafe_b64decode(padded.encode()))
+        last_id = payload["id"]
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {str(e)}")
+    # The value goes into the query, so anything but an ObjectId (e.g. an
+    # operator document) is rejected
+    if not isinstance(last_id, ObjectId):
+        raise InvalidCursorError("Invalid cursor: id is not an ObjectId")
+    return last_id
+
+
+def keyset_query(query: dict, after) -> dict:
+    """Restrict ``query`` to documents whose ``_id`` follows ``after``."""
+    if after is None:
+        return query
+    return {**query, "_id": {"$gt": after}}
+
+
+async def fetch_page(collection, query: dict, limit=None, after=None, fields=None):
+    """Fetch one page ordered by ``_id``.
+
+    ``_id`` never changes, unlike the timestamps an update rewrites, so paging
+    while documents are updated neither repeats nor skips any. Returns the
+    documents (without ``_id``, restricted to ``fields`` if given) and the
+    cursor of the next page, or ``None`` when this is the last page.
+    """
+    limit = limit or Config.PAGINATION_DEFAULT_LIMIT
+    # The cursor needs _id even when it is not returned
+    projection = None
+    if fields is not None:
+        projection = {name: 1 for name in fields}
+    # Read one extra document to know whether another page follows
+    documents = (
+        await collection.find(keyset_query(query, after), projection)
+        .sort("_id", pymongo.ASCENDING)
+        .limit(limit + 1)
+        .to_list(length=limit + 1)
+    )
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        next_cursor = encode_cursor(documents[-1])
+    for document in documents:
+        document.pop("_id", None)
+    return documents, next_cursor
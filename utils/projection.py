@@ -0,0 +1,32 @@
+from typing import Iterable, List, Optional
+
+
+class InvalidProjectionError(ValueError):
+    """Raised when ``fields`` or ``view`` names something that does not exist."""
+
+
+def select_fields(
+    allowed: Iterable[str], views: dict, fields: str = None, view: str = None
+) -> Optional[List[str]]:
+    """Turn a ``fields=a,b`` list or a named ``view`` into the fields to return.
+
+    Returns None when every field should be returned.
+    """
+    if fields:
+        names = list(dict.fromkeys(name.strip() for name in fields.split(",")))
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise InvalidProjectionError(f"Unknown fields: {', '.join(unknown)}")
+        return names
+    if view and view != "full":
+        if view not in views:
+            raise InvalidProjectionError(f"Unknown view: {view}")
+        return views[view]
+    return None
+
+
+def projection(fields: Optional[List[str]], prefix: str = "") -> dict:
+    """MongoDB projection of ``fields`` (every field when None), without ``_id``."""
+    if fields is None:
+        return {"_id": 0}
+    return {"_id": 0, **{f"{prefix}{name}": 1 for name in fields}}
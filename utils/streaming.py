@@ -0,0 +1,64 @@
+import orjson
+from typing import AsyncIterator, Optional
+from fastapi.requests import Request
+from fastapi.responses import StreamingResponse
+from utils.logger import logger
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Number of encoded records written to the socket per chunk
+CHUNK_RECORDS = 100
+
+
+def streaming_format(request: Request, stream: Optional[str]) -> Optional[str]:
+    """Return "ndjson" or "json" when the client asked for a streamed response."""
+    if stream:
+        return stream
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return "ndjson"
+    return None
+
+
+async def _encode_ndjson(documents: AsyncIterator[dict]):
+    chunk = []
+    async for document in documents:
+        chunk.append(orjson.dumps(document))
+        if len(chunk) >= CHUNK_RECORDS:
+            yield b"\n".join(chunk) + b"\n"
+            chunk = []
+    if chunk:
+        yield b"\n".join(chunk) + b"\n"
+
+
+async def _encode_json(documents: AsyncIterator[dict], message: str):
+    # Same envelope as the buffered response, with the data array streamed
+    yield b'{"message":' + orjson.dumps(message) + b',"success":true,"data":['
+    separator = b""
+    chunk = []
+    async for document in documents:
+        chunk.append(separator + orjson.dumps(document))
+        separator = b","
+        if len(chunk) >= CHUNK_RECORDS:
+            yield b"".join(chunk)
+            chunk = []
+    yield b"".join(chunk) + b"]}"
+
+
+async def _log_errors(chunks: AsyncIterator[str]):
+    # Headers are already sent, so a failure can only end the stream early
+    try:
+        async for chunk in chunks:
+            yield chunk
+    except Exception as e:
+        logger.error(f"An error occurred while streaming: {str(e)}")
+
+
+def stream_documents(documents: AsyncIterator[dict], stream_format: str, message: str):
+    """Stream documents as NDJSON lines or as a JSON envelope, encoding as they arrive."""
+    if stream_format == "ndjson":
+        return StreamingResponse(
+            _log_errors(_encode_ndjson(documents)), media_type=NDJSON_MEDIA_TYPE
+        )
+    return StreamingResponse(
+        _log_errors(_encode_json(documents, message)), media_type="application/json"
+    )